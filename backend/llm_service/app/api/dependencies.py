@@ -1,11 +1,23 @@
-from typing import Annotated, cast
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Annotated, Any, cast
 
 from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core import get_db
-from app.repositories import ConversationRepository, MessageRepository
-from app.services import ConversationService, MistralService
+from app.core import get_db, get_settings
+from app.repositories import AttachmentRepository, ConversationRepository, MessageRepository
+from app.services import (
+    ChatDedupService,
+    ChatJobService,
+    ContextBuilder,
+    ConversationService,
+    MistralService,
+    RetrievalService,
+    SummaryService,
+)
+from app.services.history_cache import HistoryCacheBackend
+from app.utils import TTLCache
 
 
 def get_conversation_repo(
@@ -20,17 +32,122 @@ def get_message_repo(
     return MessageRepository(db)
 
 
+def get_attachment_repo(
+    db: AsyncSession = Depends(get_db),
+) -> AttachmentRepository:
+    return AttachmentRepository(db)
+
+
+@lru_cache
+def get_conversation_access_cache() -> TTLCache:
+    settings = get_settings()
+    return TTLCache(
+        max_size=settings.CONVERSATION_ACCESS_CACHE_MAX_ENTRIES,
+        ttl=settings.CONVERSATION_ACCESS_CACHE_TTL,
+    )
+
+
+def get_history_cache(request: Request) -> HistoryCacheBackend | None:
+    return cast(HistoryCacheBackend | None, request.app.state.history_cache)
+
+
 def get_conversation_service(
     conversation_repo: ConversationRepository = Depends(get_conversation_repo),
+    access_cache: TTLCache = Depends(get_conversation_access_cache),
+    history_cache: HistoryCacheBackend | None = Depends(get_history_cache),
 ) -> ConversationService:
-    return ConversationService(conversation_repo)
+    return ConversationService(conversation_repo, access_cache, history_cache)
 
 
 def get_mistral_service(request: Request) -> MistralService:
     return cast(MistralService, request.app.state.mistral_service)
 
 
+def get_summary_service(request: Request) -> SummaryService:
+    return cast(SummaryService, request.app.state.summary_service)
+
+
+def get_chat_dedup_service(request: Request) -> ChatDedupService:
+    return cast(ChatDedupService, request.app.state.chat_dedup_service)
+
+
+def get_chat_job_service(request: Request) -> ChatJobService:
+    return cast(ChatJobService, request.app.state.chat_job_service)
+
+
+def get_retrieval_service(request: Request) -> RetrievalService:
+    return cast(RetrievalService, request.app.state.retrieval_service)
+
+
+@lru_cache
+def get_context_builder() -> ContextBuilder:
+    settings = get_settings()
+    return ContextBuilder(
+        token_budget=settings.CONTEXT_TOKEN_BUDGET,
+        history_message_max_tokens=settings.CONTEXT_HISTORY_MESSAGE_MAX_TOKENS,
+        files_share=settings.CONTEXT_FILES_SHARE,
+    )
+
+
+@dataclass
+class ChatDependencies:
+    db: AsyncSession
+    conversation_service: ConversationService
+    conversation_repo: ConversationRepository
+    message_repo: MessageRepository
+    attachment_repo: AttachmentRepository
+    mistral_service: MistralService
+    summary_service: SummaryService
+    context_builder: ContextBuilder
+    retrieval_service: RetrievalService
+
+
+def get_chat_dependencies(  # noqa: PLR0913, PLR0917
+    db: AsyncSession = Depends(get_db),
+    conversation_repo: ConversationRepository = Depends(get_conversation_repo),
+    message_repo: MessageRepository = Depends(get_message_repo),
+    attachment_repo: AttachmentRepository = Depends(get_attachment_repo),
+    conversation_service: ConversationService = Depends(get_conversation_service),
+    mistral_service: MistralService = Depends(get_mistral_service),
+    summary_service: SummaryService = Depends(get_summary_service),
+    context_builder: ContextBuilder = Depends(get_context_builder),
+    retrieval_service: RetrievalService = Depends(get_retrieval_service),
+) -> ChatDependencies:
+    return ChatDependencies(
+        db=db,
+        conversation_service=conversation_service,
+        conversation_repo=conversation_repo,
+        message_repo=message_repo,
+        attachment_repo=attachment_repo,
+        mistral_service=mistral_service,
+        summary_service=summary_service,
+        context_builder=context_builder,
+        retrieval_service=retrieval_service,
+    )
+
+
+def create_chat_dependencies(db: AsyncSession, app_state: Any) -> ChatDependencies:
+    conversation_repo = ConversationRepository(db)
+    return ChatDependencies(
+        db=db,
+        conversation_service=ConversationService(
+            conversation_repo, get_conversation_access_cache(), app_state.history_cache
+        ),
+        conversation_repo=conversation_repo,
+        message_repo=MessageRepository(db),
+        attachment_repo=AttachmentRepository(db),
+        mistral_service=app_state.mistral_service,
+        summary_service=app_state.summary_service,
+        context_builder=get_context_builder(),
+        retrieval_service=app_state.retrieval_service,
+    )
+
+
 ConversationRepoDep = Annotated[ConversationRepository, Depends(get_conversation_repo)]
 MessageRepoDep = Annotated[MessageRepository, Depends(get_message_repo)]
+AttachmentRepoDep = Annotated[AttachmentRepository, Depends(get_attachment_repo)]
 ConversationServiceDep = Annotated[ConversationService, Depends(get_conversation_service)]
 MistralServiceDep = Annotated[MistralService, Depends(get_mistral_service)]
+ChatDedupServiceDep = Annotated[ChatDedupService, Depends(get_chat_dedup_service)]
+ChatJobServiceDep = Annotated[ChatJobService, Depends(get_chat_job_service)]
+ChatDependenciesDep = Annotated[ChatDependencies, Depends(get_chat_dependencies)]
@@ -1,130 +1,490 @@
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+import json
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+import anyio
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Query, Request, UploadFile, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.dependencies import ConversationServiceDep, MessageRepoDep, MistralServiceDep
-from app.core import get_db
+from app.api.dependencies import (
+    ChatDedupServiceDep,
+    ChatDependencies,
+    ChatDependenciesDep,
+    ChatJobServiceDep,
+    create_chat_dependencies,
+)
+from app.core import get_settings
+from app.core.database import AsyncSessionLocal
 from app.middleware import get_current_user_id
-from app.prompts import get_system_prompt
-from app.schemas import ChatResponse
-from app.services import FileProcessingService, MistralService
+from app.prompts import get_system_prompt, with_conversation_summary
+from app.schemas import ChatJobResponse, ChatResponse
+from app.services import (
+    ChatJobService,
+    FileProcessingService,
+    FileService,
+    ProcessedFile,
+)
 from app.utils import handle_api_error, log
 
 
 router = APIRouter()
+settings = get_settings()
+
+
+@dataclass
+class ConversationContext:
+    conversation_id: int
+    summary: str | None
+    history: list[dict[str, str]]
+    attachments: list[ProcessedFile]
+    attachment_ids: list[int]
+
+
+@dataclass
+class PreparedPrompt:
+    system_prompt: str
+    full_message: str
+    enriched_prompt: str | None
+    history: list[dict[str, str]]
+    domain: str
+    uploaded_files: list[ProcessedFile]
 
 
 @router.post("/chat", response_model=ChatResponse, status_code=status.HTTP_200_OK)
 async def chat_endpoint(  # noqa: PLR0913, PLR0917
-    conversation_service: ConversationServiceDep,
-    message_repo: MessageRepoDep,
-    mistral_service: MistralServiceDep,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    deps: ChatDependenciesDep,
+    chat_dedup_service: ChatDedupServiceDep,
+    chat_job_service: ChatJobServiceDep,
     user_id: int = Depends(get_current_user_id),
     conversation_id: int = Form(..., description="Conversation ID", gt=0),
     message: str = Form(..., description="Message text", min_length=1, max_length=10000),
     domain: str | None = Form(None, description="Domain: legal, marketing, finance, sales, management, hr, general"),
     files: list[UploadFile] = File(default=[], description="Attached files"),
-) -> ChatResponse:
+    attachment_ids: list[int] = Form(default=[], description="IDs of attachments stored in this conversation"),
+    callback_url: str | None = Form(None, description="URL notified when an async job finishes", max_length=2048),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=255),
+    async_mode: bool = Query(False, alias="async", description="Queue the request and return a job id"),
+) -> ChatResponse | JSONResponse:
     domain = domain or "general"
 
     log.info(
         f"Chat request - user: {user_id}, conv: {conversation_id}, "
+        f"domain: {domain}, message len: {len(message)}, files: {len(files)}, async: {async_mode}"
+    )
+
+    if async_mode:
+        job = await _submit_chat_job(
+            request,
+            deps,
+            chat_job_service,
+            user_id,
+            conversation_id,
+            message,
+            domain,
+            files,
+            attachment_ids,
+            callback_url,
+        )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=job.model_dump(mode="json"),
+        )
+
+    try:
+        file_hashes = [await FileService.hash_file(file) for file in files]
+    except OSError as e:
+        raise handle_api_error(e, "chat endpoint") from e
+
+    file_hashes.extend(f"attachment:{attachment_id}" for attachment_id in sorted(set(attachment_ids)))
+    fingerprint = chat_dedup_service.build_request_fingerprint(conversation_id, message, domain, file_hashes)
+
+    stored_response = chat_dedup_service.get_response(user_id, idempotency_key, fingerprint)
+    if stored_response is not None:
+        return stored_response
+
+    actual_conversation_id, processed_files = await _accept_chat_turn(
+        deps, user_id, conversation_id, files, "chat endpoint"
+    )
+
+    # The shared generation gets its own session and the already extracted files: it outlives a caller that
+    # disconnects, while that caller's session and uploads are closed with its request.
+    app_state = request.app.state
+    response = await chat_dedup_service.run(
+        chat_dedup_service.build_request_key(user_id, fingerprint),
+        lambda: _run_chat_turn(
+            app_state, user_id, actual_conversation_id, message, domain, processed_files, attachment_ids
+        ),
+    )
+
+    chat_dedup_service.remember_response(user_id, idempotency_key, fingerprint, response)
+    return response
+
+
+@router.post("/chat/stream", status_code=status.HTTP_200_OK)
+async def chat_stream_endpoint(
+    deps: ChatDependenciesDep,
+    user_id: int = Depends(get_current_user_id),
+    conversation_id: int = Form(..., description="Conversation ID", gt=0),
+    message: str = Form(..., description="Message text", min_length=1, max_length=10000),
+    domain: str | None = Form(None, description="Domain: legal, marketing, finance, sales, management, hr, general"),
+    files: list[UploadFile] = File(default=[], description="Attached files"),
+    attachment_ids: list[int] = Form(default=[], description="IDs of attachments stored in this conversation"),
+) -> StreamingResponse:
+    domain = domain or "general"
+
+    log.info(
+        f"Chat stream request - user: {user_id}, conv: {conversation_id}, "
         f"domain: {domain}, message len: {len(message)}, files: {len(files)}"
     )
 
     try:
-        actual_conversation_id = await conversation_service.validate_conversation_access(conversation_id, user_id)
+        conversation = await _load_conversation_context(deps, conversation_id, user_id, attachment_ids)
+
+        # Return the pooled connection before file parsing and the LLM call; the write phase checks out a new one.
+        await deps.db.close()
 
         processed_files = []
         if files:
             processed_files = await FileProcessingService.process_files(files)
 
-        history = await message_repo.get_last_messages(actual_conversation_id, limit=3)
-        is_first_message = len(history) == 0
+    except (HTTPException, ValueError, SQLAlchemyError, RuntimeError, OSError) as e:
+        await deps.db.rollback()
+        raise handle_api_error(e, "chat stream endpoint") from e
+
+    prepared = _prepare_prompt(deps, message, domain, processed_files, conversation)
 
-        system_prompt = get_system_prompt(domain)
+    return StreamingResponse(
+        _stream_chat_events(deps, conversation, message, prepared),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-        full_message = message
-        if processed_files:
-            files_content = FileProcessingService.format_files_for_prompt(processed_files)
-            full_message = f"{message}\n\n{files_content}"
 
-        enriched_prompt = None
-        if is_first_message:
-            enriched_prompt = f"{system_prompt}\n\n{full_message}"
-            log.info(f"First message - enriched with system prompt for domain: {domain}")
+@router.get("/chat/jobs/{job_id}", response_model=ChatJobResponse, status_code=status.HTTP_200_OK)
+async def get_chat_job(
+    job_id: str,
+    chat_job_service: ChatJobServiceDep,
+    user_id: int = Depends(get_current_user_id),
+) -> ChatJobResponse:
+    job = chat_job_service.get_job(job_id, user_id)
 
-        response_text = await _generate_with_history_retry(
-            mistral_service=mistral_service,
-            prompt=full_message,
-            system_prompt=system_prompt,
-            history=history,
+    if job is None:
+        log.error(f"Chat job {job_id} not found for user {user_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Chat job {job_id} not found",
         )
 
-        log.info(f"Response generated: {len(response_text)} chars")
+    return job.to_response()
 
-        user_msg_record = await message_repo.save_message(
-            conversation_id=actual_conversation_id,
-            role="user",
-            content=message,
-            enriched_prompt=enriched_prompt,
-        )
 
-        assistant_msg_record = await message_repo.save_message(
-            conversation_id=actual_conversation_id,
-            role="assistant",
-            content=response_text,
+async def _submit_chat_job(  # noqa: PLR0913, PLR0917
+    request: Request,
+    deps: ChatDependencies,
+    chat_job_service: ChatJobService,
+    user_id: int,
+    conversation_id: int,
+    message: str,
+    domain: str,
+    files: list[UploadFile],
+    attachment_ids: list[int],
+    callback_url: str | None,
+) -> ChatJobResponse:
+    try:
+        chat_job_service.validate_callback_url(callback_url)
+    except ValueError as e:
+        raise handle_api_error(e, "chat job submit") from e
+
+    actual_conversation_id, processed_files = await _accept_chat_turn(
+        deps, user_id, conversation_id, files, "chat job submit"
+    )
+
+    app_state = request.app.state
+    job = chat_job_service.submit(
+        user_id,
+        actual_conversation_id,
+        lambda: _run_chat_turn(
+            app_state, user_id, actual_conversation_id, message, domain, processed_files, attachment_ids
+        ),
+        callback_url,
+    )
+    return job.to_response()
+
+
+async def _accept_chat_turn(
+    deps: ChatDependencies,
+    user_id: int,
+    conversation_id: int,
+    files: list[UploadFile],
+    context: str,
+) -> tuple[int, list[ProcessedFile]]:
+    try:
+        actual_conversation_id = await deps.conversation_service.validate_conversation_access(conversation_id, user_id)
+        await deps.db.close()
+
+        processed_files = []
+        if files:
+            processed_files = await FileProcessingService.process_files(files)
+
+    except (HTTPException, ValueError, SQLAlchemyError, RuntimeError, OSError) as e:
+        await deps.db.rollback()
+        raise handle_api_error(e, context) from e
+
+    return actual_conversation_id, processed_files
+
+
+async def _run_chat_turn(
+    app_state: Any,
+    user_id: int,
+    conversation_id: int,
+    message: str,
+    domain: str,
+    processed_files: list[ProcessedFile],
+    attachment_ids: list[int],
+) -> ChatResponse:
+    try:
+        async with AsyncSessionLocal() as db:
+            turn_deps = create_chat_dependencies(db, app_state)
+            return await _complete_chat_turn(
+                turn_deps, user_id, conversation_id, message, domain, processed_files, attachment_ids
+            )
+    except SQLAlchemyError as e:
+        raise handle_api_error(e, "chat endpoint") from e
+
+
+async def _complete_chat_turn(
+    deps: ChatDependencies,
+    user_id: int,
+    conversation_id: int,
+    message: str,
+    domain: str,
+    processed_files: list[ProcessedFile],
+    attachment_ids: list[int],
+) -> ChatResponse:
+    try:
+        conversation = await _load_conversation_context(deps, conversation_id, user_id, attachment_ids)
+
+        # Return the pooled connection before the LLM call; the write phase checks out a new one.
+        await deps.db.close()
+
+        prepared = _prepare_prompt(deps, message, domain, processed_files, conversation)
+
+        # 429s are retried with backoff inside MistralService.
+        response_text = await deps.mistral_service.generate(
+            prompt=prepared.full_message,
+            system_prompt=prepared.system_prompt,
+            history_messages=prepared.history,
+            domain=prepared.domain,
         )
 
-        await db.commit()
+        log.info(f"Response generated: {len(response_text)} chars")
 
-        log.info(f"Saved messages: user={user_msg_record.message_id}, assistant={assistant_msg_record.message_id}")
+        assistant_message_id, saved_attachment_ids = await _save_chat_turn(
+            deps, conversation, message, prepared, response_text
+        )
 
         return ChatResponse(
             response=response_text,
-            message_id=assistant_msg_record.message_id,
-            conversation_id=actual_conversation_id,
+            message_id=assistant_message_id,
+            conversation_id=conversation.conversation_id,
             status="success",
+            attachment_ids=saved_attachment_ids,
         )
 
     except (HTTPException, ValueError, SQLAlchemyError, RuntimeError, OSError) as e:
-        await db.rollback()
+        await deps.db.rollback()
         raise handle_api_error(e, "chat endpoint") from e
 
 
-async def _generate_with_history_retry(
-    mistral_service: MistralService,
-    prompt: str,
-    system_prompt: str,
-    history: list[dict[str, str]],
-) -> str:
-    history_variants: list[list[dict[str, str]]] = []
-
-    if history:
-        history_variants.append(history)
-        if len(history) > 1:
-            history_variants.append(history[-1:])
+async def _load_conversation_context(
+    deps: ChatDependencies,
+    conversation_id: int,
+    user_id: int,
+    attachment_ids: list[int],
+) -> ConversationContext:
+    summary, history = await deps.conversation_service.get_chat_context(
+        conversation_id, user_id, history_limit=settings.CONTEXT_HISTORY_FETCH_LIMIT
+    )
 
-    history_variants.append([])
+    attachment_ids = list(dict.fromkeys(attachment_ids))
+    attachments: list[ProcessedFile] = []
+    # Explicitly referenced attachments are always loaded; otherwise stored ones only refill an evicted RAG index.
+    if attachment_ids or deps.retrieval_service.needs_restore(conversation_id):
+        rows = await deps.attachment_repo.get_attachments(
+            conversation_id,
+            attachment_ids=attachment_ids or None,
+            limit=max(len(attachment_ids), settings.ATTACHMENTS_RESTORE_LIMIT),
+        )
 
-    last_error: HTTPException | None = None
+        missing = set(attachment_ids) - {row["id"] for row in rows}
+        if missing:
+            log.error(f"Attachments {sorted(missing)} not found in conversation {conversation_id}")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Attachments not found: {', '.join(str(item) for item in sorted(missing))}",
+            )
 
-    for variant in history_variants:
-        try:
-            return await mistral_service.generate(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                history_messages=variant,
+        attachments = [
+            ProcessedFile(
+                filename=row["file_name"],
+                extracted_text=row["extracted_text"],
+                content_type=row["content_type"],
+                content_hash=row["content_hash"],
+                attachment_id=row["id"],
             )
-        except HTTPException as exc:
-            if exc.status_code == status.HTTP_429_TOO_MANY_REQUESTS and variant:
-                log.warning(f"Mistral returned 429 with {len(variant)} history messages, retrying with shorter context")
-                last_error = exc
-                continue
-            raise
+            for row in rows
+        ]
+
+    return ConversationContext(
+        conversation_id=conversation_id,
+        summary=summary,
+        history=history,
+        attachments=attachments,
+        attachment_ids=attachment_ids,
+    )
+
+
+def _prepare_prompt(
+    deps: ChatDependencies,
+    message: str,
+    domain: str,
+    processed_files: list[ProcessedFile],
+    conversation: ConversationContext,
+) -> PreparedPrompt:
+    history = conversation.history
+    system_prompt = with_conversation_summary(get_system_prompt(domain), conversation.summary)
+    files = deps.retrieval_service.select_files(
+        conversation.conversation_id, message, [*conversation.attachments, *processed_files]
+    )
+    context = deps.context_builder.build(system_prompt, message, history, files)
+
+    full_message = message
+    if context.files:
+        files_content = FileProcessingService.format_files_for_prompt(context.files)
+        full_message = f"{message}\n\n{files_content}"
+
+    enriched_prompt = None
+    if not history and conversation.summary is None:
+        enriched_prompt = f"{system_prompt}\n\n{full_message}"
+        log.info(f"First message - enriched with system prompt for domain: {domain}")
+
+    return PreparedPrompt(
+        system_prompt=system_prompt,
+        full_message=full_message,
+        enriched_prompt=enriched_prompt,
+        history=context.history,
+        domain=domain,
+        uploaded_files=processed_files,
+    )
+
+
+async def _save_chat_turn(
+    deps: ChatDependencies,
+    conversation: ConversationContext,
+    message: str,
+    prepared: PreparedPrompt,
+    response_text: str,
+) -> tuple[int, list[int]]:
+    user_message_id, assistant_message_id, messages_count = await deps.message_repo.save_message_pair(
+        conversation_id=conversation.conversation_id,
+        user_content=message,
+        assistant_content=response_text,
+        enriched_prompt=prepared.enriched_prompt,
+    )
+
+    attachment_ids = list(conversation.attachment_ids)
+    for uploaded in prepared.uploaded_files:
+        if uploaded.content_hash is None:
+            continue
+        attachment_id = await deps.attachment_repo.save_attachment(
+            conversation_id=conversation.conversation_id,
+            file_name=uploaded.filename,
+            content_type=uploaded.content_type,
+            content_hash=uploaded.content_hash,
+            extracted_text=uploaded.extracted_text,
+        )
+        attachment_ids.append(attachment_id)
+
+    attachment_ids = list(dict.fromkeys(attachment_ids))
+    await deps.attachment_repo.link_to_message(user_message_id, attachment_ids)
+
+    await deps.db.commit()
+    await deps.conversation_service.append_history(
+        conversation.conversation_id,
+        [
+            {"id": user_message_id, "role": "user", "content": message},
+            {"id": assistant_message_id, "role": "assistant", "content": response_text},
+        ],
+        messages_count,
+    )
+
+    log.info(f"Saved messages: user={user_message_id}, assistant={assistant_message_id}, attachments: {attachment_ids}")
+
+    if deps.summary_service.should_refresh(len(conversation.history) + 2):
+        deps.summary_service.schedule_refresh(conversation.conversation_id)
+
+    return assistant_message_id, attachment_ids
+
+
+async def _stream_chat_events(
+    deps: ChatDependencies,
+    conversation: ConversationContext,
+    message: str,
+    prepared: PreparedPrompt,
+) -> AsyncIterator[str]:
+    conversation_id = conversation.conversation_id
+    chunks: list[str] = []
+    error_detail: str | None = None
+    assistant_message_id: int | None = None
+    attachment_ids: list[int] = []
+
+    try:
+        async for delta in deps.mistral_service.generate_stream(
+            prompt=prepared.full_message,
+            system_prompt=prepared.system_prompt,
+            history_messages=prepared.history,
+            domain=prepared.domain,
+        ):
+            chunks.append(delta)
+            yield _format_sse_event({"delta": delta})
+    except (HTTPException, ValueError, RuntimeError, OSError) as e:
+        log.error(f"Streaming generation failed for conversation {conversation_id}: {e}")
+        error_detail = str(e.detail) if isinstance(e, HTTPException) else str(e)
+    finally:
+        response_text = "".join(chunks).strip()
+        if response_text:
+            log.info(f"Stream finished: {len(response_text)} chars, persisting messages")
+            # The client may have disconnected: shield the write so the partial answer is still stored.
+            with anyio.CancelScope(shield=True):
+                try:
+                    assistant_message_id, attachment_ids = await _save_chat_turn(
+                        deps, conversation, message, prepared, response_text
+                    )
+                except SQLAlchemyError as e:
+                    log.error(f"Failed to persist streamed messages for conversation {conversation_id}: {e}")
+                    await deps.db.rollback()
+                    error_detail = error_detail or "Failed to save messages"
+
+    if error_detail is not None or assistant_message_id is None:
+        yield _format_sse_event({"detail": error_detail or "Empty response from Mistral AI"}, event="error")
+        return
+
+    yield _format_sse_event(
+        {
+            "message_id": assistant_message_id,
+            "conversation_id": conversation_id,
+            "attachment_ids": attachment_ids,
+            "status": "success",
+        },
+        event="done",
+    )
 
-    if last_error is not None:
-        raise last_error
 
-    raise RuntimeError("Failed to generate response with available history variants")
+def _format_sse_event(payload: dict[str, Any], event: str | None = None) -> str:
+    data = json.dumps(payload, ensure_ascii=False)
+    if event is None:
+        return f"data: {data}\n\n"
+    return f"event: {event}\ndata: {data}\n\n"
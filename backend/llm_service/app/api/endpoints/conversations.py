@@ -1,17 +1,27 @@
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.dependencies import ConversationRepoDep, ConversationServiceDep, MessageRepoDep
+from app.api.dependencies import AttachmentRepoDep, ConversationRepoDep, ConversationServiceDep, MessageRepoDep
 from app.core import get_db
 from app.middleware import get_current_user_id
-from app.schemas import ConversationCreate, ConversationListResponse, ConversationResponse
-from app.utils import handle_api_error, log
+from app.schemas import (
+    AttachmentListResponse,
+    AttachmentResponse,
+    ConversationCreate,
+    ConversationListResponse,
+    ConversationResponse,
+)
+from app.utils import decode_cursor, encode_cursor, handle_api_error, log
 
 
 router = APIRouter()
 
 MAX_CONVERSATIONS_LIMIT = 100
+DEFAULT_MESSAGES_LIMIT = 50
+MAX_MESSAGES_LIMIT = 200
 
 
 @router.post("/conversations", response_model=ConversationResponse, status_code=status.HTTP_201_CREATED)
@@ -52,27 +62,26 @@ async def create_conversation(
 async def get_conversations(
     conversation_repo: ConversationRepoDep,
     limit: int = 50,
-    offset: int = 0,
+    cursor: str | None = None,
     db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id),
 ) -> ConversationListResponse:
     log.debug(f"Fetching conversations for user {user_id}")
 
-    if limit < 1 or limit > MAX_CONVERSATIONS_LIMIT or offset < 0:
+    if limit < 1 or limit > MAX_CONVERSATIONS_LIMIT:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid pagination parameters: limit must be between 1 and {MAX_CONVERSATIONS_LIMIT}, "
-            "offset must be >= 0.",
+            detail=f"Invalid pagination parameters: limit must be between 1 and {MAX_CONVERSATIONS_LIMIT}.",
         )
 
     try:
-        conversations, total = await conversation_repo.get_conversations_by_user(
+        conversations, has_more = await conversation_repo.get_conversations_by_user(
             user_id=user_id,
             limit=limit,
-            offset=offset,
+            before=decode_cursor(cursor) if cursor else None,
         )
 
-        log.info(f"Found {len(conversations)} conversations (total: {total})")
+        log.info(f"Found {len(conversations)} conversations (has_more: {has_more})")
 
         conversation_responses = [
             ConversationResponse(
@@ -81,14 +90,17 @@ async def get_conversations(
                 business_context=conv.business_context,
                 created_at=conv.created_at,
                 user_id=conv.user_id,
-                messages_count=getattr(conv, "messages_count", 0),
+                messages_count=conv.messages_count,
+                last_message_at=conv.last_message_at,
             )
             for conv in conversations
         ]
 
+        last = conversations[-1] if conversations else None
         return ConversationListResponse(
             conversations=conversation_responses,
-            total=total,
+            next_cursor=encode_cursor(last.created_at, last.conversation_id) if last and has_more else None,
+            has_more=has_more,
         )
 
     except (HTTPException, ValueError, SQLAlchemyError, RuntimeError) as e:
@@ -100,21 +112,41 @@ async def get_conversation_messages(
     conversation_id: int,
     conversation_service: ConversationServiceDep,
     message_repo: MessageRepoDep,
+    limit: int = DEFAULT_MESSAGES_LIMIT,
+    cursor: str | None = None,
     db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id),
 ) -> dict:
     log.debug(f"Fetching messages for conversation {conversation_id}, user {user_id}")
 
+    if limit < 1 or limit > MAX_MESSAGES_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid pagination parameters: limit must be between 1 and {MAX_MESSAGES_LIMIT}.",
+        )
+
     try:
         await conversation_service.validate_conversation_access(conversation_id, user_id)
 
-        messages = await message_repo.get_all_messages(conversation_id)
+        messages, has_more = await message_repo.get_messages_page(
+            conversation_id,
+            limit=limit,
+            before=decode_cursor(cursor) if cursor else None,
+        )
 
-        log.info(f"Found {len(messages)} messages for conversation {conversation_id}")
+        log.info(f"Found {len(messages)} messages for conversation {conversation_id} (has_more: {has_more})")
 
+        # The cursor points at the oldest message of the page, the next page continues further back.
+        oldest = messages[0] if messages else None
         return {
             "conversation_id": conversation_id,
             "messages": messages,
+            "next_cursor": (
+                encode_cursor(datetime.fromisoformat(oldest["timestamp"]), oldest["id"])
+                if oldest and has_more
+                else None
+            ),
+            "has_more": has_more,
         }
 
     except HTTPException:
@@ -123,26 +155,51 @@ async def get_conversation_messages(
         raise handle_api_error(e, "fetch conversation messages") from e
 
 
+@router.get(
+    "/conversations/{conversation_id}/attachments",
+    response_model=AttachmentListResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_conversation_attachments(
+    conversation_id: int,
+    conversation_service: ConversationServiceDep,
+    attachment_repo: AttachmentRepoDep,
+    user_id: int = Depends(get_current_user_id),
+) -> AttachmentListResponse:
+    log.debug(f"Fetching attachments for conversation {conversation_id}, user {user_id}")
+
+    try:
+        await conversation_service.validate_conversation_access(conversation_id, user_id)
+
+        attachments = await attachment_repo.list_attachments(conversation_id)
+
+        log.info(f"Found {len(attachments)} attachments for conversation {conversation_id}")
+
+        return AttachmentListResponse(
+            conversation_id=conversation_id,
+            attachments=[AttachmentResponse(**attachment) for attachment in attachments],
+        )
+
+    except HTTPException:
+        raise
+    except (ValueError, SQLAlchemyError, RuntimeError) as e:
+        raise handle_api_error(e, "fetch conversation attachments") from e
+
+
 @router.delete("/conversations/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_conversation(
     conversation_id: int,
-    conversation_repo: ConversationRepoDep,
+    conversation_service: ConversationServiceDep,
     db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id),
 ) -> None:
     log.debug(f"Deleting conversation {conversation_id} for user {user_id}")
 
     try:
-        deleted = await conversation_repo.delete_conversation(conversation_id, user_id)
-
-        if not deleted:
-            log.error(f"Conversation {conversation_id} not found for user {user_id}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Conversation {conversation_id} not found",
-            )
+        await conversation_service.delete_conversation(conversation_id, user_id)
 
         await db.commit()
+        await conversation_service.forget_conversation(conversation_id)
         log.info(f"Deleted conversation {conversation_id}")
 
     except HTTPException:
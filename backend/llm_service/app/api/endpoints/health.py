@@ -1,7 +1,9 @@
+from typing import Any
+
 from fastapi import APIRouter, status
 from pydantic import BaseModel
 
-from app.utils import log
+from app.utils import log, metrics
 
 
 router = APIRouter()
@@ -15,3 +17,8 @@ class HealthResponse(BaseModel):
 async def health_check() -> HealthResponse:
     log.debug("Health check called")
     return HealthResponse()
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK)
+async def get_metrics() -> dict[str, Any]:
+    return metrics.snapshot()
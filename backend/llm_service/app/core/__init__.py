@@ -1,8 +1,9 @@
-from .config import Settings, get_settings
+from .config import LLMBackendSettings, Settings, get_settings
 from .database import get_db
 
 
 __all__ = [
+    "LLMBackendSettings",
     "Settings",
     "get_db",
     "get_settings",
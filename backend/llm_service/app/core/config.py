@@ -1,9 +1,22 @@
 from functools import lru_cache
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 
 
+class LLMBackendSettings(BaseModel):
+    name: str = Field(description="Backend name used in logs and metrics")
+    model: str = Field(description="Model requested from the backend")
+    base_url: str = Field(default="https://api.mistral.ai/v1", description="OpenAI-compatible API base URL")
+    api_key: str | None = Field(
+        default=None,
+        description="API key; omitted means MISTRAL_API_KEY for MISTRAL_BASE_URL, none elsewhere",
+    )
+    domains: list[str] = Field(default_factory=list, description="Domains served by the backend; empty means all")
+    max_prompt_tokens: int | None = Field(default=None, description="Largest estimated prompt the backend accepts")
+    cost_weight: float = Field(default=1.0, description="Multiplier of the routing score; lower is preferred")
+
+
 class Settings(BaseSettings):
     app_name: str = "Copilot LLM Service"
     app_version: str = "0.1.0"
@@ -21,6 +34,125 @@ class Settings(BaseSettings):
     MISTRAL_MODEL: str = Field(default="mistral-small-latest", description="Mistral AI model")
     MISTRAL_BASE_URL: str = Field(default="https://api.mistral.ai/v1", description="Mistral AI API base URL")
     MISTRAL_TIMEOUT: float = Field(default=120.0, description="Request timeout in seconds")
+    MISTRAL_CONCURRENCY_INITIAL: int = Field(default=4, description="Initial concurrent upstream requests")
+    MISTRAL_CONCURRENCY_MIN: int = Field(default=1, description="Lower bound of the adaptive concurrency limit")
+    MISTRAL_CONCURRENCY_MAX: int = Field(default=32, description="Upper bound of the adaptive concurrency limit")
+    MISTRAL_QUEUE_MAX_SIZE: int = Field(default=100, description="Max requests waiting for an upstream slot")
+    MISTRAL_QUEUE_MAX_WAIT: float = Field(default=30.0, description="Max seconds a request waits for an upstream slot")
+    MISTRAL_RETRY_MAX_ATTEMPTS: int = Field(default=3, description="Attempts per request, including the first one")
+    MISTRAL_RETRY_BASE_DELAY: float = Field(default=0.5, description="Base delay of exponential backoff in seconds")
+    MISTRAL_RETRY_MAX_DELAY: float = Field(default=8.0, description="Backoff delay cap in seconds")
+    MISTRAL_REQUEST_DEADLINE: float = Field(
+        default=180.0,
+        description="Overall deadline in seconds for a request including retries and hedges",
+    )
+    MISTRAL_HEDGING_ENABLED: bool = Field(default=False, description="Send a hedged request for slow responses")
+    MISTRAL_HEDGE_PERCENTILE: float = Field(default=0.95, description="Latency percentile used as hedge deadline")
+    MISTRAL_HEDGE_MIN_DELAY: float = Field(default=1.0, description="Lower bound of the hedge deadline in seconds")
+    LLM_BACKENDS: list[LLMBackendSettings] = Field(
+        default_factory=list,
+        description="JSON list of LLM backends; empty means a single backend from MISTRAL_MODEL and MISTRAL_BASE_URL",
+    )
+    LLM_ROUTER_EWMA_ALPHA: float = Field(default=0.2, description="Smoothing factor of backend latency and error EWMA")
+    LLM_ROUTER_DEGRADED_ERROR_RATE: float = Field(
+        default=0.5,
+        description="Error rate EWMA above which a backend is taken out of rotation",
+    )
+    LLM_ROUTER_COOLDOWN: float = Field(default=30.0, description="Seconds a degraded backend stays out of rotation")
+    CONTEXT_TOKEN_BUDGET: int = Field(default=24000, description="Estimated prompt token budget per request")
+    CONTEXT_HISTORY_FETCH_LIMIT: int = Field(default=20, description="Recent messages loaded as history candidates")
+    CONTEXT_HISTORY_MESSAGE_MAX_TOKENS: int = Field(
+        default=1500,
+        description="Assistant replies in history are truncated to this many tokens",
+    )
+    CONTEXT_FILES_SHARE: float = Field(
+        default=0.75,
+        description="Share of the free budget reserved for attached files when history is present",
+    )
+    SUMMARY_ENABLED: bool = Field(default=True, description="Maintain rolling conversation summaries")
+    SUMMARY_KEEP_RECENT: int = Field(default=6, description="Latest messages always sent verbatim, never summarized")
+    SUMMARY_REFRESH_EVERY: int = Field(default=10, description="New older messages that trigger a summary refresh")
+    SUMMARY_BATCH_SIZE: int = Field(default=50, description="Max messages folded into the summary per refresh")
+    SUMMARY_MAX_TOKENS: int = Field(default=800, description="Max tokens of a generated summary")
+    IDEMPOTENCY_CACHE_TTL: float = Field(default=86400.0, description="How long Idempotency-Key responses are kept")
+    IDEMPOTENCY_CACHE_MAX_ENTRIES: int = Field(default=10000, description="Max stored Idempotency-Key responses")
+    CHAT_JOB_WORKERS: int = Field(default=4, description="Workers draining the async chat job queue")
+    CHAT_JOB_QUEUE_SIZE: int = Field(default=200, description="Max queued async chat jobs")
+    CHAT_JOB_RESULT_TTL: float = Field(default=3600.0, description="How long finished job results are kept")
+    CHAT_JOB_MAX_STORED: int = Field(default=10000, description="Max jobs kept for polling")
+    CHAT_JOB_CALLBACK_ALLOWED_HOSTS: str = Field(
+        default="",
+        description="Comma-separated hosts allowed as callback_url targets; empty disables callbacks",
+    )
+    CHAT_JOB_CALLBACK_TIMEOUT: float = Field(default=10.0, description="Callback request timeout in seconds")
+
+    FILE_EXTRACTION_WORKERS: int = Field(default=2, description="Processes extracting text from uploaded files")
+    FILE_EXTRACTION_TIMEOUT: float = Field(default=60.0, description="Per-file text extraction timeout in seconds")
+    FILE_EXTRACTION_MAX_TASKS_PER_CHILD: int = Field(
+        default=50,
+        description="Files processed by an extraction worker before it is replaced",
+    )
+    PDF_HEAD_PAGES: int = Field(default=40, description="First pages kept when a PDF does not fit the text budget")
+    PDF_TAIL_PAGES: int = Field(
+        default=10,
+        description="Last pages kept when a PDF does not fit the text budget; 0 disables sampling",
+    )
+    OCR_ENABLED: bool = Field(default=False, description="OCR PDF pages without a text layer (needs Tesseract)")
+    OCR_LANGUAGE: str = Field(default="rus+eng", description="Tesseract languages")
+    OCR_DPI: int = Field(default=200, description="Resolution pages are rendered at for OCR")
+    OCR_WORKERS: int = Field(default=1, description="Processes running OCR")
+    OCR_PAGE_TIMEOUT: float = Field(default=60.0, description="Per-page OCR timeout in seconds")
+    OCR_MAX_PENDING_PAGES: int = Field(default=20, description="Max pages queued for OCR across all requests")
+    OCR_MAX_PAGES_PER_FILE: int = Field(default=20, description="Max pages of one file sent to OCR")
+
+    FILE_TEXT_CACHE_ENABLED: bool = Field(default=True, description="Cache extracted text by upload content hash")
+    FILE_TEXT_CACHE_DIR: str = Field(default="/app/cache/extracted_text", description="Extracted text cache directory")
+    FILE_TEXT_CACHE_MAX_BYTES: int = Field(
+        default=512 * 1024 * 1024,
+        description="Size bound of the extracted text cache, least recently used entries are evicted",
+    )
+    ATTACHMENTS_RESTORE_LIMIT: int = Field(
+        default=10,
+        description="Latest stored attachments loaded when a conversation has no document index in memory",
+    )
+    RAG_ENABLED: bool = Field(default=True, description="Send only relevant chunks of attached documents")
+    RAG_CHUNK_CHARS: int = Field(default=1500, description="Target chunk size in characters")
+    RAG_CHUNK_OVERLAP: int = Field(default=200, description="Characters shared by neighbouring chunks")
+    RAG_TOP_K: int = Field(default=8, description="Chunks added to the prompt per message")
+    RAG_MIN_DOCUMENT_CHARS: int = Field(
+        default=8000,
+        description="Documents of a conversation shorter than this in total are sent whole",
+    )
+    RAG_INDEX_TTL: float = Field(default=21600.0, description="How long a conversation document index is kept")
+    RAG_MAX_CONVERSATIONS: int = Field(default=1000, description="Max conversations with a document index in memory")
+    CONVERSATION_ACCESS_CACHE_TTL: float = Field(
+        default=300.0,
+        description="How long a confirmed conversation owner is trusted without querying the database",
+    )
+    CONVERSATION_ACCESS_CACHE_MAX_ENTRIES: int = Field(
+        default=10000,
+        description="Conversation owners kept in memory, 0 disables the cache",
+    )
+    HISTORY_CACHE_ENABLED: bool = Field(
+        default=True, description="Keep recent messages of active conversations in memory"
+    )
+    HISTORY_CACHE_MAX_CONVERSATIONS: int = Field(default=1000, description="Max conversations with a cached history")
+    HISTORY_CACHE_MAX_CHARS: int = Field(
+        default=20_000_000,
+        description="Total characters of cached messages and summaries, least recently used conversations are evicted",
+    )
+    HISTORY_CACHE_TTL: float = Field(
+        default=900.0, description="How long a cached history is trusted after its last write"
+    )
+
+    RESPONSE_CACHE_ENABLED: bool = Field(default=True, description="Cache deterministic LLM responses")
+    RESPONSE_CACHE_TTL: float = Field(default=3600.0, description="Response cache entry TTL in seconds")
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(default=1000, description="In-memory response cache size")
+    RESPONSE_CACHE_MAX_TEMPERATURE: float = Field(
+        default=0.5,
+        description="Only requests with temperature at or below this value are cached (chat uses 0.5)",
+    )
+    RESPONSE_CACHE_REDIS_URL: str = Field(default="", description="Optional Redis URL for a shared response cache")
 
     JWT_SECRET: str = Field(default="", description="JWT secret key for token validation")
 
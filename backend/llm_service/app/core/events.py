@@ -7,10 +7,36 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.config import get_settings
 from app.core.database import engine
-from app.services import MistralService
+from app.services import ChatDedupService, ChatJobService, MistralService, RetrievalService, SummaryService
+from app.services.extraction_pool import extraction_pool, ocr_pool
+from app.services.history_cache import create_history_cache
 from app.utils import log
 
 
+async def check_database() -> None:
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda _: None)
+        log.info("Database connection established successfully")
+    except (SQLAlchemyError, ConnectionError, OSError) as e:
+        log.error(f"Failed to connect to database: {e}")
+        raise
+
+
+async def stop_background_workers(app: FastAPI, timeout: float) -> None:
+    await app.state.chat_job_service.close(timeout=timeout)
+    log.info("Chat job workers stopped")
+
+    await app.state.summary_service.close(timeout=timeout)
+    log.info("Summary service closed")
+
+    extraction_pool.close()
+    ocr_pool.close()
+
+    if app.state.history_cache is not None:
+        await app.state.history_cache.close()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     log.info("Application startup")
@@ -20,19 +46,23 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     app.state.mistral_service = mistral_service
     log.info("Mistral service initialized")
 
-    try:
-        async with engine.begin() as conn:
-            await conn.run_sync(lambda _: None)
-        log.info("Database connection established successfully")
-    except (SQLAlchemyError, ConnectionError, OSError) as e:
-        log.error(f"Failed to connect to database: {e}")
-        raise
+    app.state.history_cache = create_history_cache(settings)
+    app.state.summary_service = SummaryService(mistral_service, app.state.history_cache)
+    app.state.chat_dedup_service = ChatDedupService()
+    app.state.retrieval_service = RetrievalService()
+
+    app.state.chat_job_service = ChatJobService()
+    app.state.chat_job_service.start()
+
+    await check_database()
 
     yield
 
     log.info("Application shutdown - starting graceful shutdown")
     shutdown_timeout = settings.SHUTDOWN_TIMEOUT
 
+    await stop_background_workers(app, timeout=shutdown_timeout / 4)
+
     async def close_mistral() -> None:
         try:
             await mistral_service.close(timeout=shutdown_timeout / 2)
@@ -1,6 +1,7 @@
+from app.models.attachment import Attachment, MessageAttachment
 from app.models.base import Base
 from app.models.conversation import Conversation
 from app.models.message import Message
 
 
-__all__ = ["Base", "Conversation", "Message"]
+__all__ = ["Attachment", "Base", "Conversation", "Message", "MessageAttachment"]
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, ForeignKey, Index, Text, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class Attachment(Base):
+    __tablename__ = "attachments"
+    __table_args__ = (
+        UniqueConstraint("conversation_id", "content_hash", name="uq_attachments_conversation_hash"),
+        Index("ix_attachments_conversation_id", "conversation_id"),
+    )
+
+    attachment_id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+    )
+    conversation_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("conversations.conversation_id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    file_name: Mapped[str] = mapped_column(Text, nullable=False)
+    content_type: Mapped[str | None] = mapped_column(Text, nullable=True)
+    content_hash: Mapped[str] = mapped_column(Text, nullable=False)
+    extracted_text: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+
+
+class MessageAttachment(Base):
+    __tablename__ = "message_attachments"
+    __table_args__ = (Index("ix_message_attachments_attachment_id", "attachment_id"),)
+
+    message_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("messages.message_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    attachment_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("attachments.attachment_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
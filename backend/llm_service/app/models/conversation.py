@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import BigInteger, Index, Text, func
+from sqlalchemy import BigInteger, Index, Integer, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -16,7 +16,7 @@ if TYPE_CHECKING:
 class Conversation(Base):
     __tablename__ = "conversations"
     __table_args__ = (
-        Index("ix_conversations_user_created", "user_id", "created_at"),
+        Index("ix_conversations_user_created_id", "user_id", "created_at", "conversation_id"),
         Index("ix_conversations_user_id", "user_id"),
     )
 
@@ -29,6 +29,11 @@ class Conversation(Base):
     business_context: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    summary_message_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # Maintained by MessageRepository.save_message_pair so listings do not have to aggregate messages.
+    messages_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    last_message_at: Mapped[datetime | None] = mapped_column(nullable=True)
 
     messages: Mapped[list[Message]] = relationship(
         "Message",
@@ -16,7 +16,7 @@ if TYPE_CHECKING:
 class Message(Base):
     __tablename__ = "messages"
     __table_args__ = (
-        Index("ix_messages_conversation_created", "conversation_id", "created_at"),
+        Index("ix_messages_conversation_created_id", "conversation_id", "created_at", "message_id"),
         Index("ix_messages_conversation_id", "conversation_id"),
     )
 
@@ -1,4 +1,10 @@
+from .summary_prompts import SUMMARY_SYSTEM_PROMPT, build_summary_request, with_conversation_summary
 from .system_prompts import get_system_prompt
 
 
-__all__ = ["get_system_prompt"]
+__all__ = [
+    "SUMMARY_SYSTEM_PROMPT",
+    "build_summary_request",
+    "get_system_prompt",
+    "with_conversation_summary",
+]
@@ -0,0 +1,27 @@
+SUMMARY_SYSTEM_PROMPT = """Ты ведешь краткое содержание делового диалога между пользователем и ИИ-ассистентом.
+
+Твоя задача:
+- Объединить предыдущее краткое содержание (если оно есть) с новыми сообщениями
+- Сохранить факты о бизнесе пользователя, принятые решения, цифры, имена, договоренности и открытые вопросы
+- Убрать приветствия, повторы и общие рассуждения
+
+Формат ответа:
+- Только обновленное краткое содержание, без вступлений и пояснений
+- Сжатые пункты на русском языке
+- Не более 300 слов"""
+
+SUMMARY_CONTEXT_HEADER = "[КРАТКОЕ СОДЕРЖАНИЕ ПРЕДЫДУЩЕЙ ЧАСТИ ДИАЛОГА]"
+
+ROLE_LABELS = {"user": "Пользователь", "assistant": "Ассистент"}
+
+
+def build_summary_request(previous_summary: str | None, messages: list[dict[str, str]]) -> str:
+    transcript = "\n\n".join(f"{ROLE_LABELS.get(m['role'], m['role'])}: {m['content']}" for m in messages)
+    previous = previous_summary or "(пока нет)"
+    return f"Предыдущее краткое содержание:\n{previous}\n\nНовые сообщения:\n{transcript}"
+
+
+def with_conversation_summary(system_prompt: str, summary: str | None) -> str:
+    if not summary:
+        return system_prompt
+    return f"{system_prompt}\n\n{SUMMARY_CONTEXT_HEADER}\n{summary}"
@@ -1,5 +1,6 @@
+from app.repositories.attachment_repository import AttachmentRepository
 from app.repositories.conversation_repository import ConversationRepository
 from app.repositories.message_repository import MessageRepository
 
 
-__all__ = ["ConversationRepository", "MessageRepository"]
+__all__ = ["AttachmentRepository", "ConversationRepository", "MessageRepository"]
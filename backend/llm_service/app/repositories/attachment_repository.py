@@ -0,0 +1,103 @@
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models import Attachment, MessageAttachment
+from app.repositories.base import BaseRepository
+
+
+class AttachmentRepository(BaseRepository):
+    async def save_attachment(
+        self,
+        conversation_id: int,
+        file_name: str,
+        content_type: str | None,
+        content_hash: str,
+        extracted_text: str,
+    ) -> int:
+        # The same document attached twice to a conversation is stored once.
+        stmt = (
+            insert(Attachment)
+            .values(
+                conversation_id=conversation_id,
+                file_name=file_name,
+                content_type=content_type,
+                content_hash=content_hash,
+                extracted_text=extracted_text,
+            )
+            .on_conflict_do_update(
+                constraint="uq_attachments_conversation_hash",
+                set_={"file_name": file_name, "extracted_text": extracted_text},
+            )
+            .returning(Attachment.attachment_id)
+        )
+        result = await self.session.execute(stmt)
+        return int(result.scalar_one())
+
+    async def link_to_message(self, message_id: int, attachment_ids: list[int]) -> None:
+        if not attachment_ids:
+            return
+
+        stmt = (
+            insert(MessageAttachment)
+            .values([{"message_id": message_id, "attachment_id": attachment_id} for attachment_id in attachment_ids])
+            .on_conflict_do_nothing()
+        )
+        await self.session.execute(stmt)
+
+    async def get_attachments(
+        self,
+        conversation_id: int,
+        attachment_ids: list[int] | None = None,
+        limit: int = 10,
+    ) -> list[dict]:
+        conditions = [Attachment.conversation_id == conversation_id]
+        if attachment_ids is not None:
+            conditions.append(Attachment.attachment_id.in_(attachment_ids))
+
+        stmt = (
+            select(
+                Attachment.attachment_id,
+                Attachment.file_name,
+                Attachment.content_type,
+                Attachment.content_hash,
+                Attachment.extracted_text,
+            )
+            .where(*conditions)
+            .order_by(Attachment.attachment_id.desc())
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return [
+            {
+                "id": row.attachment_id,
+                "file_name": row.file_name,
+                "content_type": row.content_type,
+                "content_hash": row.content_hash,
+                "extracted_text": row.extracted_text,
+            }
+            for row in reversed(result.all())
+        ]
+
+    async def list_attachments(self, conversation_id: int) -> list[dict]:
+        stmt = (
+            select(
+                Attachment.attachment_id,
+                Attachment.file_name,
+                Attachment.content_type,
+                Attachment.created_at,
+                func.length(Attachment.extracted_text).label("text_length"),
+            )
+            .where(Attachment.conversation_id == conversation_id)
+            .order_by(Attachment.attachment_id.asc())
+        )
+        result = await self.session.execute(stmt)
+        return [
+            {
+                "attachment_id": row.attachment_id,
+                "file_name": row.file_name,
+                "content_type": row.content_type,
+                "created_at": row.created_at,
+                "text_length": row.text_length,
+            }
+            for row in result.all()
+        ]
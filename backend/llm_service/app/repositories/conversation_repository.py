@@ -1,4 +1,7 @@
-from sqlalchemy import func, select
+from datetime import datetime
+
+from sqlalchemy import JSON, func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 
 from app.models import Conversation, Message
 from app.repositories.base import BaseRepository
@@ -23,55 +26,104 @@ class ConversationRepository(BaseRepository):
         self,
         user_id: int,
         limit: int = 50,
-        offset: int = 0,
-    ) -> tuple[list[Conversation], int]:
-        messages_count_subquery = (
-            select(Message.conversation_id, func.count(Message.message_id).label("messages_count"))
-            .group_by(Message.conversation_id)
-            .subquery()
-        )
+        before: tuple[datetime, int] | None = None,
+    ) -> tuple[list[Conversation], bool]:
+        stmt = select(Conversation).where(Conversation.user_id == user_id)
+        if before is not None:
+            stmt = stmt.where(tuple_(Conversation.created_at, Conversation.conversation_id) < before)
 
-        total_window = func.count(Conversation.conversation_id).over().label("total")
+        # One extra row tells whether another page exists without counting the user's conversations.
+        stmt = stmt.order_by(Conversation.created_at.desc(), Conversation.conversation_id.desc()).limit(limit + 1)
 
-        stmt = (
+        result = await self.session.execute(stmt)
+        conversations = list(result.scalars().all())
+        return conversations[:limit], len(conversations) > limit
+
+    async def get_conversation_by_id(self, conversation_id: int, user_id: int) -> Conversation | None:
+        stmt = select(Conversation).where(
+            Conversation.conversation_id == conversation_id,
+            Conversation.user_id == user_id,
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_chat_context(
+        self,
+        conversation_id: int,
+        user_id: int,
+        history_limit: int,
+    ) -> dict | None:
+        # Ownership check, summary and the history after it come back in one round trip.
+        conversation = (
             select(
-                Conversation,
-                func.coalesce(messages_count_subquery.c.messages_count, 0).label("msg_count"),
-                total_window,
+                Conversation.conversation_id,
+                Conversation.summary,
+                Conversation.summary_message_id,
+                Conversation.messages_count,
             )
-            .outerjoin(
-                messages_count_subquery, Conversation.conversation_id == messages_count_subquery.c.conversation_id
+            .where(Conversation.conversation_id == conversation_id, Conversation.user_id == user_id)
+            .cte("conversation")
+        )
+        recent = (
+            select(Message.message_id, Message.role, Message.content, Message.created_at)
+            .join(conversation, Message.conversation_id == conversation.c.conversation_id)
+            .where(
+                or_(
+                    conversation.c.summary_message_id.is_(None),
+                    Message.message_id > conversation.c.summary_message_id,
+                )
             )
-            .where(Conversation.user_id == user_id)
-            .order_by(Conversation.created_at.desc())
-            .limit(limit)
-            .offset(offset)
+            .order_by(Message.created_at.desc(), Message.message_id.desc())
+            .limit(history_limit)
+            .subquery()
         )
+        history = select(
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_object(
+                        "id", recent.c.message_id, "role", recent.c.role, "content", recent.c.content
+                    ),
+                    recent.c.created_at.asc(),
+                    recent.c.message_id.asc(),
+                ),
+                type_=JSON,
+            )
+        ).scalar_subquery()
 
+        stmt = select(
+            conversation.c.summary,
+            conversation.c.summary_message_id,
+            conversation.c.messages_count,
+            history.label("history"),
+        )
         result = await self.session.execute(stmt)
-        rows = result.all()
-
-        if not rows:
-            return [], 0
-
-        conversations = []
-        total = 0
-        for row in rows:
-            conversation = row[0]
-            conversation.messages_count = row[1]
-            if total == 0:
-                total = row[2] or 0
-            conversations.append(conversation)
-
-        return conversations, total
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return {
+            "summary": row.summary,
+            "summary_message_id": row.summary_message_id,
+            "messages_count": row.messages_count,
+            "history": row.history or [],
+        }
 
-    async def get_conversation_by_id(self, conversation_id: int, user_id: int) -> Conversation | None:
-        stmt = select(Conversation).where(
+    async def get_summary(self, conversation_id: int) -> tuple[str | None, int | None]:
+        stmt = select(Conversation.summary, Conversation.summary_message_id).where(
             Conversation.conversation_id == conversation_id,
-            Conversation.user_id == user_id,
         )
         result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+        row = result.one_or_none()
+        if row is None:
+            return None, None
+        return row.summary, row.summary_message_id
+
+    async def update_summary(self, conversation_id: int, summary: str, summary_message_id: int) -> None:
+        stmt = (
+            update(Conversation)
+            .where(Conversation.conversation_id == conversation_id)
+            .values(summary=summary, summary_message_id=summary_message_id)
+        )
+        await self.session.execute(stmt)
 
     async def delete_conversation(self, conversation_id: int, user_id: int) -> bool:
         conversation = await self.get_conversation_by_id(conversation_id, user_id)
@@ -1,48 +1,93 @@
-from sqlalchemy import select
+from datetime import datetime
 
-from app.models import Message
+from sqlalchemy import func, insert, select, tuple_, update
+
+from app.models import Conversation, Message
 from app.repositories.base import BaseRepository
 
 
 class MessageRepository(BaseRepository):
-    async def save_message(
+    async def save_message_pair(
         self,
         conversation_id: int,
-        role: str,
-        content: str,
+        user_content: str,
+        assistant_content: str,
         enriched_prompt: str | None = None,
-    ) -> Message:
-        message = Message(
-            conversation_id=conversation_id,
-            role=role,
-            content=content,
-            enriched_prompt=enriched_prompt,
+    ) -> tuple[int, int, int]:
+        # Both messages and the conversation counters are written by a single statement.
+        inserted = (
+            insert(Message)
+            .values(
+                [
+                    {
+                        "conversation_id": conversation_id,
+                        "role": "user",
+                        "content": user_content,
+                        "enriched_prompt": enriched_prompt,
+                    },
+                    {
+                        "conversation_id": conversation_id,
+                        "role": "assistant",
+                        "content": assistant_content,
+                        "enriched_prompt": None,
+                    },
+                ]
+            )
+            .returning(Message.message_id, Message.role)
+            .cte("inserted")
         )
-        self.session.add(message)
-        return message
-
-    async def get_last_messages(self, conversation_id: int, limit: int = 5) -> list[dict[str, str]]:
-        subquery = (
-            select(Message.message_id, Message.role, Message.content, Message.created_at)
-            .where(Message.conversation_id == conversation_id)
-            .order_by(Message.created_at.desc())
-            .limit(limit)
-            .subquery()
+        counters = (
+            update(Conversation)
+            .where(Conversation.conversation_id == conversation_id)
+            .values(messages_count=Conversation.messages_count + 2, last_message_at=func.now())
+            .returning(Conversation.messages_count)
+            .cte("counters")
         )
 
-        stmt = select(subquery.c.role, subquery.c.content).order_by(subquery.c.created_at.asc())
+        stmt = select(inserted.c.message_id, inserted.c.role, counters.c.messages_count)
+        rows = (await self.session.execute(stmt)).all()
+        message_ids = {row.role: row.message_id for row in rows}
+        return message_ids["user"], message_ids["assistant"], rows[0].messages_count
+
+    async def get_messages_after(
+        self,
+        conversation_id: int,
+        after_message_id: int | None,
+        limit: int,
+    ) -> list[dict]:
+        conditions = [Message.conversation_id == conversation_id]
+        if after_message_id is not None:
+            conditions.append(Message.message_id > after_message_id)
 
+        stmt = (
+            select(Message.message_id, Message.role, Message.content)
+            .where(*conditions)
+            .order_by(Message.message_id.asc())
+            .limit(limit)
+        )
         result = await self.session.execute(stmt)
-        messages = [{"role": row.role, "content": row.content} for row in result.all()]
-        return messages
+        return [{"id": row.message_id, "role": row.role, "content": row.content} for row in result.all()]
 
-    async def get_all_messages(self, conversation_id: int) -> list[dict[str, str]]:
+    async def get_messages_page(
+        self,
+        conversation_id: int,
+        limit: int,
+        before: tuple[datetime, int] | None = None,
+    ) -> tuple[list[dict], bool]:
+        conditions = [Message.conversation_id == conversation_id]
+        if before is not None:
+            conditions.append(tuple_(Message.created_at, Message.message_id) < before)
+
+        # Pages go from the newest messages backwards; each page is returned in chronological order.
         stmt = (
             select(Message.message_id, Message.role, Message.content, Message.created_at)
-            .where(Message.conversation_id == conversation_id)
-            .order_by(Message.created_at.asc())
+            .where(*conditions)
+            .order_by(Message.created_at.desc(), Message.message_id.desc())
+            .limit(limit + 1)
         )
         result = await self.session.execute(stmt)
+        rows = result.all()
+
         messages = [
             {
                 "id": row.message_id,
@@ -50,6 +95,6 @@ class MessageRepository(BaseRepository):
                 "content": row.content,
                 "timestamp": row.created_at.isoformat(),
             }
-            for row in result.all()
+            for row in reversed(rows[:limit])
         ]
-        return messages
+        return messages, len(rows) > limit
@@ -1,8 +1,12 @@
-from .chat import ChatRequest, ChatResponse
+from .attachment import AttachmentListResponse, AttachmentResponse
+from .chat import ChatJobResponse, ChatRequest, ChatResponse
 from .conversation import ConversationCreate, ConversationListResponse, ConversationResponse
 
 
 __all__ = [
+    "AttachmentListResponse",
+    "AttachmentResponse",
+    "ChatJobResponse",
     "ChatRequest",
     "ChatResponse",
     "ConversationCreate",
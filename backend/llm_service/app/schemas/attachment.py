@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class AttachmentResponse(BaseModel):
+    attachment_id: int
+    file_name: str
+    content_type: str | None
+    created_at: datetime
+    text_length: int = Field(..., description="Length of the extracted text in characters")
+
+
+class AttachmentListResponse(BaseModel):
+    conversation_id: int
+    attachments: list[AttachmentResponse]
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, Field
 
 
@@ -15,3 +17,14 @@ class ChatResponse(BaseModel):
     message_id: int = Field(..., description="ID created assistant message")
     conversation_id: int = Field(..., description="Actual conversation ID from DB")
     status: str = "success"
+    attachment_ids: list[int] = Field(default_factory=list, description="Stored attachments of the user message")
+
+
+class ChatJobResponse(BaseModel):
+    job_id: str
+    status: str = Field(..., description="queued, running, completed or failed")
+    conversation_id: int
+    result: ChatResponse | None = None
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
@@ -18,6 +18,7 @@ class ConversationResponse(BaseModel):
     created_at: datetime
     user_id: int
     messages_count: int = Field(default=0, description="Количество сообщений в диалоге")
+    last_message_at: datetime | None = Field(default=None, description="Время последнего сообщения")
 
     class Config:
         from_attributes = True
@@ -25,4 +26,5 @@ class ConversationResponse(BaseModel):
 
 class ConversationListResponse(BaseModel):
     conversations: list[ConversationResponse]
-    total: int
+    next_cursor: str | None = Field(default=None, description="Курсор следующей страницы")
+    has_more: bool = False
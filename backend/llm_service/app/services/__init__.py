@@ -1,12 +1,24 @@
+from .chat_dedup_service import ChatDedupService
+from .chat_job_service import ChatJobService
+from .context_builder import ContextBuilder, PromptContext
 from .conversation_service import ConversationService
-from .file_processing_service import FileProcessingService
+from .file_processing_service import FileProcessingService, ProcessedFile
 from .file_service import FileService
 from .mistral_service import MistralService
+from .retrieval_service import RetrievalService
+from .summary_service import SummaryService
 
 
 __all__ = [
+    "ChatDedupService",
+    "ChatJobService",
+    "ContextBuilder",
     "ConversationService",
     "FileProcessingService",
     "FileService",
     "MistralService",
+    "ProcessedFile",
+    "PromptContext",
+    "RetrievalService",
+    "SummaryService",
 ]
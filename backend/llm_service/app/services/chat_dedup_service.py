@@ -0,0 +1,69 @@
+import hashlib
+from collections.abc import Awaitable, Callable
+from typing import cast
+
+from fastapi import HTTPException, status
+
+from app.core import get_settings
+from app.schemas import ChatResponse
+from app.utils import SingleFlight, TTLCache, log, metrics
+
+
+class ChatDedupService:
+    def __init__(self) -> None:
+        settings = get_settings()
+        self._single_flight = SingleFlight()
+        self._responses = TTLCache(
+            max_size=settings.IDEMPOTENCY_CACHE_MAX_ENTRIES,
+            ttl=settings.IDEMPOTENCY_CACHE_TTL,
+        )
+
+    @staticmethod
+    def build_request_fingerprint(
+        conversation_id: int,
+        message: str,
+        domain: str,
+        file_hashes: list[str],
+    ) -> str:
+        digest = hashlib.sha256()
+        for part in (str(conversation_id), message, domain, *file_hashes):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def build_request_key(user_id: int, fingerprint: str) -> str:
+        return f"chat:{user_id}:{fingerprint}"
+
+    def get_response(self, user_id: int, idempotency_key: str | None, fingerprint: str) -> ChatResponse | None:
+        if not idempotency_key:
+            return None
+
+        stored = cast(tuple[str, ChatResponse] | None, self._responses.get((user_id, idempotency_key)))
+        if stored is None:
+            return None
+
+        stored_fingerprint, response = stored
+        if stored_fingerprint != fingerprint:
+            log.error(f"Idempotency key {idempotency_key} (user {user_id}) reused with a different request")
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Idempotency-Key was already used with a different request",
+            )
+
+        metrics.increment("chat_idempotent_replays")
+        log.info(f"Replaying stored response for idempotency key {idempotency_key} (user {user_id})")
+        return response
+
+    def remember_response(
+        self, user_id: int, idempotency_key: str | None, fingerprint: str, response: ChatResponse
+    ) -> None:
+        if idempotency_key:
+            self._responses.set((user_id, idempotency_key), (fingerprint, response))
+
+    async def run(self, request_key: str, func: Callable[[], Awaitable[ChatResponse]]) -> ChatResponse:
+        response, shared = await self._single_flight.do(request_key, func)
+        if shared:
+            metrics.increment("chat_single_flight_shared")
+            log.info(f"Duplicate chat request joined in-flight generation {request_key}")
+        return response
@@ -0,0 +1,171 @@
+import asyncio
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from enum import StrEnum
+from typing import cast
+from urllib.parse import urlparse
+
+import httpx
+from fastapi import HTTPException, status
+
+from app.core import get_settings
+from app.schemas import ChatJobResponse, ChatResponse
+from app.utils import TTLCache, log, metrics
+
+
+class ChatJobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class ChatJob:
+    job_id: str
+    user_id: int
+    conversation_id: int
+    run: Callable[[], Awaitable[ChatResponse]]
+    callback_url: str | None = None
+    status: ChatJobStatus = ChatJobStatus.QUEUED
+    result: ChatResponse | None = None
+    error: str | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    finished_at: datetime | None = None
+
+    def to_response(self) -> ChatJobResponse:
+        return ChatJobResponse(
+            job_id=self.job_id,
+            status=self.status.value,
+            conversation_id=self.conversation_id,
+            result=self.result,
+            error=self.error,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+        )
+
+
+class ChatJobService:
+    def __init__(self) -> None:
+        self.settings = get_settings()
+        self._queue: asyncio.Queue[ChatJob] = asyncio.Queue(maxsize=self.settings.CHAT_JOB_QUEUE_SIZE)
+        self._jobs = TTLCache(max_size=self.settings.CHAT_JOB_MAX_STORED, ttl=self.settings.CHAT_JOB_RESULT_TTL)
+        self._workers: list[asyncio.Task[None]] = []
+        self._allowed_callback_hosts = {
+            host.strip().lower() for host in self.settings.CHAT_JOB_CALLBACK_ALLOWED_HOSTS.split(",") if host.strip()
+        }
+
+    def start(self) -> None:
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"chat-job-worker-{index}")
+            for index in range(self.settings.CHAT_JOB_WORKERS)
+        ]
+        log.info(f"Chat job workers started: {len(self._workers)}")
+
+    def validate_callback_url(self, callback_url: str | None) -> None:
+        if not callback_url:
+            return
+
+        parsed = urlparse(callback_url)
+        host = (parsed.hostname or "").lower()
+        if parsed.scheme not in {"http", "https"} or host not in self._allowed_callback_hosts:
+            raise ValueError("callback_url host is not allowed")
+
+    def submit(
+        self,
+        user_id: int,
+        conversation_id: int,
+        run: Callable[[], Awaitable[ChatResponse]],
+        callback_url: str | None = None,
+    ) -> ChatJob:
+        job = ChatJob(
+            job_id=uuid.uuid4().hex,
+            user_id=user_id,
+            conversation_id=conversation_id,
+            run=run,
+            callback_url=callback_url,
+        )
+
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull as e:
+            metrics.increment("chat_jobs_rejected")
+            log.warning(f"Chat job queue is full ({self._queue.qsize()} jobs), rejecting job for user {user_id}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many queued chat jobs. Please retry later.",
+            ) from e
+
+        self._jobs.set(job.job_id, job)
+        metrics.increment("chat_jobs_submitted")
+        metrics.set_gauge("chat_jobs_queue_depth", self._queue.qsize())
+        log.info(f"Chat job {job.job_id} queued for user {user_id}, conv {conversation_id}")
+        return job
+
+    def get_job(self, job_id: str, user_id: int) -> ChatJob | None:
+        job = cast(ChatJob | None, self._jobs.get(job_id))
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            metrics.set_gauge("chat_jobs_queue_depth", self._queue.qsize())
+            try:
+                await self._execute(job)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: ChatJob) -> None:
+        job.status = ChatJobStatus.RUNNING
+        started_at = datetime.now(UTC)
+        metrics.observe("chat_jobs_wait_seconds", (started_at - job.created_at).total_seconds())
+
+        try:
+            job.result = await job.run()
+            job.status = ChatJobStatus.COMPLETED
+            metrics.increment("chat_jobs_completed")
+        except HTTPException as e:
+            job.status = ChatJobStatus.FAILED
+            job.error = str(e.detail)
+            metrics.increment("chat_jobs_failed")
+            log.error(f"Chat job {job.job_id} failed: {e.detail}")
+        except Exception as e:  # noqa: BLE001
+            # An escaping error would kill the worker loop and leave the job "running" for pollers forever.
+            job.status = ChatJobStatus.FAILED
+            job.error = "Internal server error"
+            metrics.increment("chat_jobs_failed")
+            log.error(f"Chat job {job.job_id} failed unexpectedly: {e}", exc_info=True)
+
+        job.finished_at = datetime.now(UTC)
+        metrics.observe("chat_jobs_run_seconds", (job.finished_at - started_at).total_seconds())
+
+        if job.callback_url:
+            await self._notify(job)
+
+    async def _notify(self, job: ChatJob) -> None:
+        try:
+            async with httpx.AsyncClient(timeout=self.settings.CHAT_JOB_CALLBACK_TIMEOUT) as client:
+                response = await client.post(str(job.callback_url), json=job.to_response().model_dump(mode="json"))
+                response.raise_for_status()
+            log.info(f"Chat job {job.job_id} callback delivered")
+        except httpx.HTTPError as e:
+            metrics.increment("chat_jobs_callback_failed")
+            log.warning(f"Chat job {job.job_id} callback failed: {e}")
+
+    async def close(self, timeout: float = 10.0) -> None:
+        if not self._workers:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except TimeoutError:
+            log.warning(f"Chat job queue not drained within {timeout}s, {self._queue.qsize()} jobs dropped")
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
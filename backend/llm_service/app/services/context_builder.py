@@ -0,0 +1,101 @@
+import math
+from dataclasses import dataclass, replace
+
+from app.services.file_processing_service import ProcessedFile
+from app.utils import log
+
+
+LATIN_CHARS_PER_TOKEN = 4.0
+NON_LATIN_CHARS_PER_TOKEN = 2.5
+MESSAGE_OVERHEAD_TOKENS = 4
+TRUNCATION_MARKER = "\n[...сокращено...]"
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+
+    # Cyrillic and most other non-ASCII letters take two UTF-8 bytes, so the byte surplus approximates their count.
+    non_latin = min(len(text), len(text.encode("utf-8")) - len(text))
+    latin = len(text) - non_latin
+    return math.ceil(latin / LATIN_CHARS_PER_TOKEN + non_latin / NON_LATIN_CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    keep_chars = int(len(text) * max_tokens / tokens)
+    return text[:keep_chars].rstrip() + TRUNCATION_MARKER
+
+
+@dataclass
+class PromptContext:
+    history: list[dict[str, str]]
+    files: list[ProcessedFile]
+    estimated_tokens: int
+
+
+class ContextBuilder:
+    def __init__(self, token_budget: int, history_message_max_tokens: int, files_share: float) -> None:
+        self.token_budget = token_budget
+        self.history_message_max_tokens = history_message_max_tokens
+        self.files_share = files_share
+
+    def build(
+        self,
+        system_prompt: str,
+        message: str,
+        history: list[dict[str, str]],
+        processed_files: list[ProcessedFile],
+    ) -> PromptContext:
+        used = estimate_tokens(system_prompt) + estimate_tokens(message) + 2 * MESSAGE_OVERHEAD_TOKENS
+        remaining = max(0, self.token_budget - used)
+
+        files_budget = int(remaining * self.files_share) if history else remaining
+        files = self._fit_files(processed_files, files_budget)
+        files_tokens = sum(estimate_tokens(pf.extracted_text) for pf in files)
+        remaining -= files_tokens
+        used += files_tokens
+
+        selected: list[dict[str, str]] = []
+        for item in reversed(history):
+            content = item["content"]
+            if item["role"] == "assistant":
+                content = truncate_to_tokens(content, self.history_message_max_tokens)
+
+            cost = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+            if cost > remaining:
+                break
+
+            selected.append({"role": item["role"], "content": content})
+            remaining -= cost
+            used += cost
+
+        selected.reverse()
+
+        log.debug(
+            f"Prompt context: {len(selected)}/{len(history)} history messages, "
+            f"{len(files)} files, ~{used} tokens of {self.token_budget}"
+        )
+
+        return PromptContext(history=selected, files=files, estimated_tokens=used)
+
+    @staticmethod
+    def _fit_files(processed_files: list[ProcessedFile], budget: int) -> list[ProcessedFile]:
+        if not processed_files:
+            return []
+
+        sizes = [estimate_tokens(pf.extracted_text) for pf in processed_files]
+        total = sum(sizes)
+        if total <= budget:
+            return list(processed_files)
+
+        log.info(f"Attached files take ~{total} tokens, shrinking proportionally to ~{budget}")
+        return [
+            replace(pf, extracted_text=truncate_to_tokens(pf.extracted_text, budget * size // total))
+            for pf, size in zip(processed_files, sizes, strict=True)
+        ]
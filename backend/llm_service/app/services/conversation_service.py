@@ -1,25 +1,122 @@
+from collections import deque
+from typing import NoReturn
+
 from fastapi import HTTPException, status
 
 from app.repositories import ConversationRepository
-from app.utils import log
+from app.services.history_cache import CachedHistory, HistoryCacheBackend
+from app.utils import TTLCache, log, metrics
 
 
 class ConversationService:
-    def __init__(self, conversation_repo: ConversationRepository) -> None:
+    def __init__(
+        self,
+        conversation_repo: ConversationRepository,
+        access_cache: TTLCache | None = None,
+        history_cache: HistoryCacheBackend | None = None,
+    ) -> None:
         self.conversation_repo = conversation_repo
+        # conversation_id -> owner user_id; ids are never reused, so only deletion makes an entry stale.
+        self.access_cache = access_cache
+        self.history_cache = history_cache
 
     async def validate_conversation_access(
         self,
         conversation_id: int,
         user_id: int,
     ) -> int:
+        if self._is_cached_owner(conversation_id, user_id):
+            return conversation_id
+
         conversation = await self.conversation_repo.get_conversation_by_id(conversation_id, user_id=user_id)
 
         if conversation is None:
-            log.error(f"Conversation {conversation_id} not found for user {user_id}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Conversation {conversation_id} not found",
-            )
+            self._raise_not_found(conversation_id, user_id)
 
+        self._remember_owner(conversation_id, user_id)
         return conversation.conversation_id
+
+    async def get_chat_context(
+        self,
+        conversation_id: int,
+        user_id: int,
+        history_limit: int,
+    ) -> tuple[str | None, list[dict[str, str]]]:
+        cached = await self._get_cached_history(conversation_id, user_id, history_limit)
+        if cached is not None:
+            return cached.summary, cached.history(history_limit)
+
+        context = await self.conversation_repo.get_chat_context(conversation_id, user_id, history_limit)
+
+        if context is None:
+            self._raise_not_found(conversation_id, user_id)
+
+        self._remember_owner(conversation_id, user_id)
+        history = CachedHistory(
+            summary=context["summary"],
+            summary_message_id=context["summary_message_id"],
+            messages_count=context["messages_count"],
+            messages=deque(context["history"]),
+        )
+        if self.history_cache is not None and history_limit >= self.history_cache.max_messages:
+            await self.history_cache.set(conversation_id, history)
+        return history.summary, history.history(history_limit)
+
+    async def append_history(self, conversation_id: int, messages: list[dict], messages_count: int) -> None:
+        # Called once the messages are committed, so a rolled back turn never reaches the cache.
+        if self.history_cache is not None:
+            await self.history_cache.append(conversation_id, messages, messages_count)
+
+    async def delete_conversation(self, conversation_id: int, user_id: int) -> None:
+        deleted = await self.conversation_repo.delete_conversation(conversation_id, user_id)
+
+        if not deleted:
+            self._raise_not_found(conversation_id, user_id)
+
+    async def forget_conversation(self, conversation_id: int) -> None:
+        # Called once the deletion is committed, so a concurrent request cannot re-seed the caches from the old row.
+        if self.access_cache is not None:
+            self.access_cache.pop(conversation_id)
+        if self.history_cache is not None:
+            await self.history_cache.invalidate(conversation_id)
+
+    async def _get_cached_history(
+        self,
+        conversation_id: int,
+        user_id: int,
+        history_limit: int,
+    ) -> CachedHistory | None:
+        if self.history_cache is None or history_limit > self.history_cache.max_messages:
+            return None
+
+        # A cached history is only served once the ownership cache vouches for the user as well.
+        history = await self.history_cache.get(conversation_id)
+        if history is None or not self._is_cached_owner(conversation_id, user_id):
+            metrics.increment("history_cache_misses")
+            return None
+
+        metrics.increment("history_cache_hits")
+        return history
+
+    def _is_cached_owner(self, conversation_id: int, user_id: int) -> bool:
+        if self.access_cache is None:
+            return False
+
+        if self.access_cache.get(conversation_id) == user_id:
+            metrics.increment("conversation_access_cache_hits")
+            return True
+
+        metrics.increment("conversation_access_cache_misses")
+        return False
+
+    def _remember_owner(self, conversation_id: int, user_id: int) -> None:
+        if self.access_cache is not None:
+            self.access_cache.set(conversation_id, user_id)
+
+    @staticmethod
+    def _raise_not_found(conversation_id: int, user_id: int) -> NoReturn:
+        log.error(f"Conversation {conversation_id} not found for user {user_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Conversation {conversation_id} not found",
+        )
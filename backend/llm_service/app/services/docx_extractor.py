@@ -0,0 +1,133 @@
+import posixpath
+import shutil
+import subprocess  # noqa: S404
+import tempfile
+import zipfile
+from collections.abc import Iterator
+from pathlib import Path
+from xml.etree.ElementTree import Element, iterparse  # noqa: S405
+
+
+DEFAULT_DOCUMENT_PART = "word/document.xml"
+OFFICE_DOCUMENT_REL = "/officeDocument"
+PARAGRAPH_BREAKS = {"br": "\n", "cr": "\n", "tab": "\t"}
+# Paragraph and run properties hold formatting only, e.g. w:pPr/w:tabs/w:tab defines tab stops, not tab characters.
+PROPERTY_ELEMENTS = {"pPr", "rPr"}
+
+
+def local_name(tag: str) -> str:
+    # Transitional and Strict OOXML use different namespaces for the same elements.
+    return tag.rpartition("}")[2]
+
+
+def find_document_part(archive: zipfile.ZipFile) -> str:
+    # The stdlib expat parser never fetches external entities and caps entity expansion, which is enough for uploads.
+    if "_rels/.rels" in archive.namelist():
+        with archive.open("_rels/.rels") as xml_file:
+            for _, element in iterparse(xml_file):  # noqa: S314
+                if local_name(element.tag) == "Relationship" and element.get("Type", "").endswith(OFFICE_DOCUMENT_REL):
+                    return posixpath.normpath(element.get("Target", DEFAULT_DOCUMENT_PART).lstrip("/"))
+    return DEFAULT_DOCUMENT_PART
+
+
+def collect_text(element: Element, parts: list[str]) -> None:
+    for child in element:
+        name = local_name(child.tag)
+        if name == "t":
+            parts.append(child.text or "")
+        elif name in PARAGRAPH_BREAKS:
+            parts.append(PARAGRAPH_BREAKS[name])
+        elif name not in PROPERTY_ELEMENTS:
+            collect_text(child, parts)
+
+
+def paragraph_text(paragraph: Element) -> str:
+    parts: list[str] = []
+    collect_text(paragraph, parts)
+    return "".join(parts)
+
+
+class DocxBlockParser:
+    def __init__(self) -> None:
+        # Each open table keeps its rows, each open row its cells, each open cell its paragraphs,
+        # so nested tables end up inside the cell that contains them.
+        self.tables: list[list[str]] = []
+        self.rows: list[list[str]] = []
+        self.cells: list[list[str]] = []
+
+    def start(self, name: str) -> None:
+        if name == "tbl":
+            self.tables.append([])
+        elif name == "tr":
+            self.rows.append([])
+        elif name == "tc":
+            self.cells.append([])
+
+    def end(self, name: str, element: Element) -> str | None:
+        if name == "p":
+            block = paragraph_text(element)
+        elif name == "tc" and self.cells and self.rows:
+            self.rows[-1].append(" ".join(self.cells.pop()).replace("|", "/"))
+            block = ""
+        elif name == "tr" and self.rows and self.tables:
+            row = self.rows.pop()
+            if any(row):
+                # Rows of a nested table are flattened into the text of the enclosing cell.
+                line = "; ".join(cell for cell in row if cell) if self.cells else "| " + " | ".join(row) + " |"
+                self.tables[-1].append(line)
+            block = ""
+        elif name == "tbl" and self.tables:
+            block = "\n".join(self.tables.pop())
+        else:
+            return None
+
+        # Finished blocks are dropped from the tree, so memory does not grow with the document.
+        element.clear()
+        if not block.strip():
+            return None
+        if self.cells:
+            self.cells[-1].append(block.strip())
+            return None
+        return block
+
+
+def iter_docx_blocks(path: str) -> Iterator[str]:
+    parser = DocxBlockParser()
+    with zipfile.ZipFile(path) as archive, archive.open(find_document_part(archive)) as xml_file:
+        for event, element in iterparse(xml_file, events=("start", "end")):  # noqa: S314
+            if event == "start":
+                parser.start(local_name(element.tag))
+            elif (block := parser.end(local_name(element.tag), element)) is not None:
+                yield block
+
+
+def extract_docx_text(path: str) -> str:
+    return "\n\n".join(iter_docx_blocks(path))
+
+
+def convert_doc_to_text(path: str, timeout: float) -> str:
+    antiword = shutil.which("antiword")
+    if antiword:
+        result = subprocess.run(  # noqa: S603
+            [antiword, "-m", "UTF-8.txt", "-w", "0", path],
+            capture_output=True,
+            timeout=timeout,
+            check=False,
+        )
+        if result.returncode == 0:
+            return result.stdout.decode("utf-8", errors="replace")
+
+    soffice = shutil.which("soffice") or shutil.which("libreoffice")
+    if soffice:
+        with tempfile.TemporaryDirectory(prefix="llm_doc_") as out_dir:
+            subprocess.run(  # noqa: S603
+                [soffice, "--headless", "--convert-to", "txt:Text (encoded):UTF8", "--outdir", out_dir, path],
+                capture_output=True,
+                timeout=timeout,
+                check=False,
+            )
+            converted = Path(out_dir) / f"{Path(path).stem}.txt"
+            if converted.exists():
+                return converted.read_text(encoding="utf-8-sig", errors="replace")
+
+    raise ValueError("Legacy DOC files cannot be converted on this server, please save the file as DOCX")
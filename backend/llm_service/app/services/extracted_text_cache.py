@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+from app.core import get_settings
+from app.utils import log, metrics
+
+
+CACHE_FILE_SUFFIX = ".txt"
+
+
+class ExtractedTextCache:
+    def __init__(self) -> None:
+        self.settings = get_settings()
+        self.enabled = self.settings.FILE_TEXT_CACHE_ENABLED
+        self.max_bytes = self.settings.FILE_TEXT_CACHE_MAX_BYTES
+        self.directory = Path(self.settings.FILE_TEXT_CACHE_DIR)
+        self._index: OrderedDict[str, int] | None = None
+        self._total_bytes = 0
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def build_key(extractor_version: str, file_ext: str, content_hash: str) -> str:
+        return hashlib.sha256(f"{extractor_version}:{file_ext}:{content_hash}".encode()).hexdigest()
+
+    async def get(self, key: str) -> str | None:
+        if not self.enabled:
+            return None
+
+        async with self._lock:
+            index = await self._get_index()
+            if key not in index:
+                metrics.increment("file_text_cache_misses")
+                return None
+            index.move_to_end(key)
+
+        try:
+            text = await asyncio.to_thread(self._read, self._path(key))
+        except OSError as e:
+            log.warning(f"Extracted text cache entry {key[:12]} unreadable: {e}")
+            async with self._lock:
+                self._forget(key)
+            metrics.increment("file_text_cache_misses")
+            return None
+
+        metrics.increment("file_text_cache_hits")
+        return text
+
+    async def set(self, key: str, text: str) -> None:
+        if not self.enabled:
+            return
+
+        data = text.encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+
+        try:
+            await asyncio.to_thread(self._write, self._path(key), data)
+        except OSError as e:
+            log.warning(f"Failed to store extracted text in cache: {e}")
+            return
+
+        async with self._lock:
+            index = await self._get_index()
+            self._forget(key)
+            index[key] = len(data)
+            self._total_bytes += len(data)
+            evicted = self._evict()
+
+        if evicted:
+            await asyncio.to_thread(self._remove, [self._path(k) for k in evicted])
+            metrics.increment("file_text_cache_evictions", len(evicted))
+
+        metrics.set_gauge("file_text_cache_bytes", self._total_bytes)
+
+    async def _get_index(self) -> OrderedDict[str, int]:
+        if self._index is None:
+            try:
+                entries = await asyncio.to_thread(self._scan)
+            except OSError as e:
+                log.warning(f"Extracted text cache directory {self.directory} unavailable, cache disabled: {e}")
+                self.enabled = False
+                entries = []
+            self._index = OrderedDict(entries)
+            self._total_bytes = sum(self._index.values())
+            log.info(f"Extracted text cache: {len(self._index)} entries, {self._total_bytes} bytes in {self.directory}")
+        return self._index
+
+    def _evict(self) -> list[str]:
+        evicted: list[str] = []
+        if self._index is None:
+            return evicted
+
+        while self._total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            evicted.append(key)
+        return evicted
+
+    def _forget(self, key: str) -> None:
+        if self._index is not None and key in self._index:
+            self._total_bytes -= self._index.pop(key)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{CACHE_FILE_SUFFIX}"
+
+    def _scan(self) -> list[tuple[str, int]]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        entries: list[tuple[float, str, int]] = []
+        for path in self.directory.glob(f"*/*{CACHE_FILE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        # Access refreshes mtime, so the oldest mtime is the least recently used entry.
+        entries.sort()
+        return [(key, size) for _, key, size in entries]
+
+    @staticmethod
+    def _read(path: Path) -> str:
+        text = path.read_text(encoding="utf-8")
+        os.utime(path)
+        return text
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+
+    @staticmethod
+    def _remove(paths: list[Path]) -> None:
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+
+extracted_text_cache = ExtractedTextCache()
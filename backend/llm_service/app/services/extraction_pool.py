@@ -0,0 +1,125 @@
+import asyncio
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TypeVar
+
+from app.core import get_settings
+from app.utils import log, metrics
+
+
+T = TypeVar("T")
+
+
+class ExtractionPool:
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        timeout: float,
+        max_tasks_per_child: int,
+        max_pending: int | None = None,
+    ) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_pending = max_pending
+        self._pending = 0
+        # Jobs are handed to the executor only when a worker is free, so the deadline covers run time, not queueing.
+        self._slots = asyncio.Semaphore(max_workers)
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def run(self, func: Callable[..., T], *args: object) -> T:
+        if self.max_pending is not None and self._pending >= self.max_pending:
+            metrics.increment(f"{self.name}_pool_rejected")
+            raise RuntimeError(f"Too many pending {self.name} tasks")
+
+        self._pending += 1
+        metrics.set_gauge(f"{self.name}_pool_pending", self._pending)
+        try:
+            return await self._run(func, *args)
+        finally:
+            self._pending -= 1
+            metrics.set_gauge(f"{self.name}_pool_pending", self._pending)
+
+    async def _run(self, func: Callable[..., T], *args: object) -> T:
+        loop = asyncio.get_running_loop()
+
+        # One retry covers a pool broken by another request's timeout or a crashed worker.
+        for attempt in range(2):
+            async with self._slots:
+                executor = self._get_executor()
+                try:
+                    return await asyncio.wait_for(loop.run_in_executor(executor, func, *args), timeout=self.timeout)
+                except TimeoutError as e:
+                    metrics.increment(f"{self.name}_timeouts")
+                    log.warning(f"{self.name} task exceeded {self.timeout:.0f}s, recycling workers")
+                    self._recycle(executor)
+                    raise ValueError(f"Text extraction timed out after {self.timeout:.0f}s") from e
+                except BrokenProcessPool as e:
+                    metrics.increment(f"{self.name}_pool_broken")
+                    self._recycle(executor)
+                    error: BaseException = e
+                except asyncio.CancelledError as e:
+                    task = asyncio.current_task()
+                    if task is not None and task.cancelling():
+                        raise
+                    # The job was dropped when another request recycled the pool, not cancelled by its caller.
+                    metrics.increment(f"{self.name}_pool_cancelled")
+                    error = e
+
+            if attempt:
+                raise RuntimeError("Text extraction worker crashed") from error
+            log.warning(f"{self.name} worker pool is broken, retrying on a fresh pool")
+
+        raise RuntimeError("Text extraction failed")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+                max_tasks_per_child=self.max_tasks_per_child,
+            )
+            log.info(f"{self.name} process pool started: {self.max_workers} workers")
+        return self._executor
+
+    def _recycle(self, executor: ProcessPoolExecutor) -> None:
+        if executor is self._executor:
+            self._executor = None
+
+        # A stuck worker cannot be cancelled, so its process is terminated together with the pool.
+        processes = list((executor._processes or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def close(self) -> None:
+        if self._executor is None:
+            return
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        log.info(f"{self.name} process pool stopped")
+
+
+settings = get_settings()
+
+extraction_pool = ExtractionPool(
+    name="file_extraction",
+    max_workers=settings.FILE_EXTRACTION_WORKERS,
+    timeout=settings.FILE_EXTRACTION_TIMEOUT,
+    max_tasks_per_child=settings.FILE_EXTRACTION_MAX_TASKS_PER_CHILD,
+)
+
+# OCR gets its own small pool and queue bound so scanned documents cannot occupy the regular extraction workers.
+ocr_pool = ExtractionPool(
+    name="ocr",
+    max_workers=settings.OCR_WORKERS,
+    timeout=settings.OCR_PAGE_TIMEOUT,
+    max_tasks_per_child=settings.FILE_EXTRACTION_MAX_TASKS_PER_CHILD,
+    max_pending=settings.OCR_MAX_PENDING_PAGES,
+)
@@ -11,6 +11,9 @@ from app.utils import log
 class ProcessedFile:
     filename: str
     extracted_text: str
+    content_type: str | None = None
+    content_hash: str | None = None
+    attachment_id: int | None = None
 
 
 class FileProcessingService:
@@ -20,13 +23,15 @@ class FileProcessingService:
         if not is_valid:
             raise ValueError(error_msg)
 
-        text = await FileService.extract_text(file)
+        text, content_hash = await FileService.extract_text(file)
 
         log.info(f"File {file.filename} processed, extracted {len(text)} characters")
 
         return ProcessedFile(
             filename=str(file.filename),
             extracted_text=text,
+            content_type=file.content_type,
+            content_hash=content_hash,
         )
 
     @staticmethod
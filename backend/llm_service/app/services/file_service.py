@@ -1,21 +1,57 @@
-import io
+import asyncio
+import hashlib
+import os
 import re
+import subprocess  # noqa: S404
+import tempfile
+import zipfile
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import BinaryIO, ClassVar
+from typing import ClassVar
 
 import chardet
 import fitz
 from docx import Document
 from fastapi import UploadFile
 
-from app.utils import log
+from app.core import get_settings
+from app.services.docx_extractor import convert_doc_to_text, extract_docx_text
+from app.services.extracted_text_cache import extracted_text_cache
+from app.services.extraction_pool import extraction_pool, ocr_pool
+from app.services.table_extractor import summarize_csv, summarize_xlsx
+from app.utils import log, metrics
+
+
+settings = get_settings()
+
+MOJIBAKE_CODECS = ("cp1251", "koi8-r")
+CYRILLIC_DELETE_TABLE = dict.fromkeys([*range(ord("А"), ord("я") + 1), ord("Ё"), ord("ё")])
+PAGE_HEADER = "--- Страница {page} ---\n"
+# Pages without a text layer are left as markers by the extraction worker and filled in by the OCR pool.
+OCR_MARKER = "\x00ocr\x00"
+OCR_PART_PATTERN = re.compile(r"--- Страница (\d+) ---\n\x00ocr\x00")
+PDF_TEXT_FLAGS = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_DEHYPHENATE
+
+
+@dataclass
+class MojibakeState:
+    codec: str | None = None
+    probed_pages: int = 0
 
 
 class FileService:
-    ALLOWED_EXTENSIONS: ClassVar[set[str]] = {".pdf", ".txt", ".md", ".docx", ".doc"}
+    ALLOWED_EXTENSIONS: ClassVar[set[str]] = {".pdf", ".txt", ".md", ".docx", ".doc", ".csv", ".xlsx"}
     MAX_FILE_SIZE: ClassVar[int] = 10 * 1024 * 1024
     MAX_TEXT_LENGTH: ClassVar[int] = 50000
     MIN_ENCODING_CONFIDENCE: ClassVar[float] = 0.7
+    MOJIBAKE_PROBE_PAGES: ClassVar[int] = 5
+    HASH_CHUNK_SIZE: ClassVar[int] = 1024 * 1024
+    # Bump whenever extraction output changes so cached texts from the old extractor are not reused.
+    EXTRACTOR_VERSION: ClassVar[str] = "5"
+    OCR_VERSION: ClassVar[str] = "1"
+    UPLOAD_TEMP_PREFIX: ClassVar[str] = "llm_upload_"
 
     @classmethod
     def validate_file(cls, file: UploadFile) -> tuple[bool, str | None]:
@@ -32,21 +68,60 @@ class FileService:
         return True, None
 
     @classmethod
-    async def extract_text(cls, file: UploadFile) -> str:
+    async def hash_file(cls, file: UploadFile) -> str:
+        digest = hashlib.sha256()
+        try:
+            while chunk := await file.read(cls.HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        finally:
+            await file.seek(0)
+        return digest.hexdigest()
+
+    @classmethod
+    @asynccontextmanager
+    async def spool_upload(cls, file: UploadFile) -> AsyncIterator[tuple[Path, str]]:
+        file_ext = Path(str(file.filename)).suffix.lower()
+        fd, name = tempfile.mkstemp(prefix=cls.UPLOAD_TEMP_PREFIX, suffix=file_ext)
+        path = Path(name)
+        digest = hashlib.sha256()
+        size = 0
+
+        try:
+            with os.fdopen(fd, "wb") as spool:
+                while chunk := await file.read(cls.HASH_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > cls.MAX_FILE_SIZE:
+                        raise ValueError(f"File is too large. Maximum: {cls.MAX_FILE_SIZE / (1024 * 1024):.1f}MB")
+                    digest.update(chunk)
+                    await asyncio.to_thread(spool.write, chunk)
+
+            yield path, digest.hexdigest()
+        finally:
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+            await file.seek(0)
+
+    @classmethod
+    async def extract_text(cls, file: UploadFile) -> tuple[str, str]:
         file_ext = Path(str(file.filename)).suffix.lower()
         log.info(f"Extracting text from file: {file.filename} (type: {file_ext})")
 
         try:
-            content = await file.read()
-
-            if file_ext == ".pdf":
-                text = cls._extract_from_pdf(io.BytesIO(content))
-            elif file_ext in {".docx", ".doc"}:
-                text = cls._extract_from_docx(io.BytesIO(content))
-            elif file_ext in {".txt", ".md"}:
-                text = cls._extract_from_text(content)
-            else:
-                raise ValueError(f"Unsupported file format: {file_ext}")
+            async with cls.spool_upload(file) as (path, content_hash):
+                ocr_page_limit = settings.OCR_MAX_PAGES_PER_FILE if settings.OCR_ENABLED else 0
+                pdf_sampling = f"{settings.PDF_HEAD_PAGES}:{settings.PDF_TAIL_PAGES}"
+                cache_key = extracted_text_cache.build_key(
+                    f"{cls.EXTRACTOR_VERSION}:{cls.MAX_TEXT_LENGTH}:{pdf_sampling}:{ocr_page_limit}",
+                    file_ext,
+                    content_hash,
+                )
+                cached_text = await extracted_text_cache.get(cache_key)
+                if cached_text is not None:
+                    log.info(f"Extracted text for {file.filename} served from cache: {len(cached_text)} characters")
+                    return cached_text, content_hash
+
+                text = await extraction_pool.run(cls._extract_file, file_ext, str(path), ocr_page_limit)
+                if OCR_MARKER in text:
+                    text = await cls._apply_ocr(path, content_hash, text)
 
             if len(text) > cls.MAX_TEXT_LENGTH:
                 log.warning(
@@ -55,8 +130,11 @@ class FileService:
                 )
                 text = text[: cls.MAX_TEXT_LENGTH] + "\n\n[...text truncated...]"
 
+            text = text.strip()
+            await extracted_text_cache.set(cache_key, text)
+
             log.info(f"Successfully extracted {len(text)} characters from {file.filename}")
-            return text.strip()
+            return text, content_hash
 
         except (ValueError, OSError, RuntimeError) as e:
             log.error(f"Error extracting text from {file.filename}: {e}")
@@ -64,68 +142,124 @@ class FileService:
         finally:
             await file.seek(0)
 
-    @staticmethod
-    def _fix_cyrillic_encoding(text: str) -> str:
-        if not text:
-            return text
+    @classmethod
+    async def _apply_ocr(cls, path: Path, content_hash: str, text: str) -> str:
+        pages = [int(page) for page in OCR_PART_PATTERN.findall(text)]
+        has_text_layer = text.count("--- Страница ") > len(pages)
+        log.info(f"Running OCR on {len(pages)} pages without a text layer")
+        results = await asyncio.gather(*(cls._ocr_page(path, content_hash, page) for page in pages))
+        ocr_texts = dict(zip(pages, results, strict=True))
 
-        candidates = [text]
+        def replace(match: re.Match[str]) -> str:
+            page = int(match.group(1))
+            return PAGE_HEADER.format(page=page) + ocr_texts[page] if ocr_texts[page] else ""
+
+        if not has_text_layer and not any(results):
+            raise ValueError("Failed to extract text from any page of the PDF")
+        return OCR_PART_PATTERN.sub(replace, text)
+
+    @classmethod
+    async def _ocr_page(cls, path: Path, content_hash: str, page: int) -> str:
+        cache_key = extracted_text_cache.build_key(
+            f"ocr:{cls.OCR_VERSION}:{settings.OCR_LANGUAGE}:{settings.OCR_DPI}", f"page{page}", content_hash
+        )
+        cached_text = await extracted_text_cache.get(cache_key)
+        if cached_text is not None:
+            return cached_text
 
         try:
-            fixed_cp1251 = text.encode("latin1").decode("cp1251")
-            if fixed_cp1251 != text:
-                candidates.append(fixed_cp1251)
-        except (UnicodeEncodeError, UnicodeDecodeError):
-            pass
+            text = await ocr_pool.run(cls._ocr_pdf_page, str(path), page, settings.OCR_LANGUAGE, settings.OCR_DPI)
+        except (ValueError, RuntimeError, OSError) as e:
+            metrics.increment("ocr_pages_failed")
+            log.warning(f"OCR of page {page} failed: {e}")
+            return ""
 
+        metrics.increment("ocr_pages")
+        await extracted_text_cache.set(cache_key, text)
+        return text
+
+    @staticmethod
+    def _ocr_pdf_page(path: str, page_num: int, language: str, dpi: int) -> str:
+        with fitz.open(path, filetype="pdf") as doc:
+            page = doc[page_num - 1]
+            textpage = page.get_textpage_ocr(language=language, dpi=dpi, full=True)
+            return str(page.get_text(textpage=textpage)).strip()
+
+    @classmethod
+    def _extract_file(cls, file_ext: str, path: str, ocr_page_limit: int = 0) -> str:
+        if file_ext == ".pdf":
+            return cls._extract_from_pdf(path, ocr_page_limit)
+        if file_ext == ".docx":
+            return cls._extract_from_docx(path)
+        if file_ext == ".doc":
+            return cls._extract_from_doc(path)
+        if file_ext == ".csv":
+            return summarize_csv(path)
+        if file_ext == ".xlsx":
+            return summarize_xlsx(path)
+        if file_ext in {".txt", ".md"}:
+            return cls._extract_from_text(Path(path).read_bytes())
+        raise ValueError(f"Unsupported file format: {file_ext}")
+
+    @staticmethod
+    def _count_cyrillic(text: str) -> int:
+        return len(text) - len(text.translate(CYRILLIC_DELETE_TABLE))
+
+    @staticmethod
+    def _is_mojibake_candidate(text: str) -> bool:
+        # Mojibake here is cp1251/koi8-r bytes decoded as latin1: pure ASCII or real Cyrillic pages never qualify.
+        if text.isascii():
+            return False
         try:
-            fixed_koi8 = text.encode("latin1").decode("koi8-r")
-            if fixed_koi8 != text:
-                candidates.append(fixed_koi8)
-        except (UnicodeEncodeError, UnicodeDecodeError):
-            pass
+            text.encode("latin1")
+        except UnicodeEncodeError:
+            return False
+        return True
 
-        best_candidate = text
-        max_cyrillic = len(re.findall(r"[а-яА-ЯёЁ]", text))
+    @classmethod
+    def _detect_cyrillic_codec(cls, sample: str) -> str | None:
+        raw = sample.encode("latin1")
+        best_codec = None
+        max_cyrillic = cls._count_cyrillic(sample)
 
-        for cand in candidates[1:]:
-            cyr_count = len(re.findall(r"[а-яА-ЯёЁ]", cand))
+        for codec in MOJIBAKE_CODECS:
+            try:
+                cyr_count = cls._count_cyrillic(raw.decode(codec))
+            except UnicodeDecodeError:
+                continue
             if cyr_count > max_cyrillic:
                 max_cyrillic = cyr_count
-                best_candidate = cand
+                best_codec = codec
 
-        return best_candidate
+        return best_codec
+
+    @staticmethod
+    def _repair_cyrillic(text: str, codec: str) -> str:
+        try:
+            return text.encode("latin1").decode(codec)
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            return text
 
     @classmethod
-    def _extract_from_pdf(cls, file_obj: BinaryIO) -> str:
+    def _extract_from_pdf(cls, path: str, ocr_page_limit: int = 0) -> str:
         doc = None
         try:
-            doc = fitz.open(stream=file_obj.read(), filetype="pdf")
+            doc = fitz.open(path, filetype="pdf")
 
             if doc.needs_pass:
                 raise ValueError("PDF file is protected by a password")
 
-            text_parts = []
-            total_pages = len(doc)
-
-            for page_num in range(total_pages):
-                try:
-                    page = doc[page_num]
-                    page_text = page.get_text(
-                        flags=(fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_DEHYPHENATE),
-                    )
-
-                    fixed_text = cls._fix_cyrillic_encoding(page_text)
-                    if fixed_text.strip():
-                        text_parts.append(f"--- Страница {page_num + 1} ---\n{fixed_text}")
-
-                except (IndexError, RuntimeError, ValueError) as e:
-                    log.warning(f"Failed to extract text from page {page_num + 1}: {e}")
-                    continue
-
-            if not text_parts:
+            pages = cls._collect_pdf_pages(doc, ocr_page_limit)
+            if not pages:
                 raise ValueError("Failed to extract text from any page of the PDF")
 
+            text_parts = [part for _, part in pages]
+            total_pages = len(doc)
+            if len(pages) < total_pages:
+                page_ranges = cls._format_page_ranges([page_num for page_num, _ in pages])
+                log.info(f"PDF excerpt: pages {page_ranges} of {total_pages}")
+                text_parts.insert(0, f"[Выдержка из документа: страницы {page_ranges} из {total_pages}]")
+
             return "\n\n".join(text_parts)
 
         except ValueError:
@@ -136,20 +270,140 @@ class FileService:
             if doc is not None:
                 doc.close()
 
+    @classmethod
+    def _collect_pdf_pages(cls, doc: fitz.Document, ocr_page_limit: int) -> list[tuple[int, str]]:
+        mojibake = MojibakeState()
+        total_pages = len(doc)
+        pages, complete = cls._read_pdf_pages(doc, range(total_pages), cls.MAX_TEXT_LENGTH, mojibake, ocr_page_limit)
+
+        head_pages, tail_pages = settings.PDF_HEAD_PAGES, settings.PDF_TAIL_PAGES
+        if complete or tail_pages <= 0 or total_pages <= head_pages + tail_pages:
+            return pages
+
+        # The text does not fit the budget: the head keeps its share and the rest goes to the last pages,
+        # so a long head cannot crowd the tail out entirely.
+        head_budget = cls.MAX_TEXT_LENGTH - cls.MAX_TEXT_LENGTH * tail_pages // (head_pages + tail_pages)
+        head: list[tuple[int, str]] = []
+        head_chars = 0
+        for page_num, part in pages:
+            if page_num > head_pages or head_chars >= head_budget:
+                break
+            head.append((page_num, part))
+            head_chars += len(part)
+
+        ocr_pages_left = ocr_page_limit - sum(OCR_MARKER in part for _, part in head)
+        tail, _ = cls._read_pdf_pages(
+            doc,
+            range(total_pages - tail_pages, total_pages),
+            cls.MAX_TEXT_LENGTH - head_chars,
+            mojibake,
+            ocr_pages_left,
+        )
+        return head + tail
+
+    @classmethod
+    def _read_pdf_pages(
+        cls,
+        doc: fitz.Document,
+        page_range: range,
+        char_limit: int,
+        mojibake: MojibakeState,
+        ocr_page_limit: int,
+    ) -> tuple[list[tuple[int, str]], bool]:
+        pages: list[tuple[int, str]] = []
+        ocr_pages = 0
+        extracted_chars = 0
+
+        for page_num in page_range:
+            if extracted_chars >= char_limit:
+                return pages, False
+
+            try:
+                page = doc[page_num]
+                page_text = cls._fix_page_encoding(page.get_text(flags=PDF_TEXT_FLAGS), mojibake)
+                # A blank page carrying images is most likely a scan.
+                needs_ocr = not page_text.strip() and ocr_pages < ocr_page_limit and bool(page.get_images())
+            except (IndexError, RuntimeError, ValueError) as e:
+                log.warning(f"Failed to extract text from page {page_num + 1}: {e}")
+                continue
+
+            if page_text.strip():
+                part = PAGE_HEADER.format(page=page_num + 1) + page_text
+                extracted_chars += len(part)
+            elif needs_ocr:
+                part = PAGE_HEADER.format(page=page_num + 1) + OCR_MARKER
+                ocr_pages += 1
+            else:
+                continue
+            pages.append((page_num + 1, part))
+
+        return pages, True
+
+    @classmethod
+    def _fix_page_encoding(cls, page_text: str, mojibake: MojibakeState) -> str:
+        if not cls._is_mojibake_candidate(page_text):
+            return page_text
+
+        # The encoding is decided once per document. Candidate pages are probed until one yields a codec, so a cover
+        # page with a stray "©" or "§" does not switch repair off for the whole file.
+        if mojibake.codec is None and mojibake.probed_pages < cls.MOJIBAKE_PROBE_PAGES:
+            mojibake.codec = cls._detect_cyrillic_codec(page_text)
+            mojibake.probed_pages += 1
+            if mojibake.codec is not None:
+                log.info(f"PDF text looks like {mojibake.codec} mojibake, repairing")
+
+        if mojibake.codec is None:
+            return page_text
+        return cls._repair_cyrillic(page_text, mojibake.codec)
+
+    @staticmethod
+    def _format_page_ranges(pages: list[int]) -> str:
+        ranges: list[str] = []
+        start = previous = pages[0]
+
+        for page in [*pages[1:], None]:
+            if page is not None and page == previous + 1:
+                previous = page
+                continue
+            ranges.append(str(start) if start == previous else f"{start}-{previous}")
+            if page is not None:
+                start = previous = page
+
+        return ", ".join(ranges)
+
     @staticmethod
-    def _extract_from_docx(file_obj: BinaryIO) -> str:
+    def _extract_from_docx(path: str) -> str:
         try:
-            doc = Document(file_obj)
-            paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
+            try:
+                text = extract_docx_text(path)
+            except (zipfile.BadZipFile, KeyError, SyntaxError) as e:
+                log.warning(f"Streaming DOCX parser failed ({e}), falling back to python-docx")
+                doc = Document(path)
+                text = "\n\n".join(para.text for para in doc.paragraphs if para.text.strip())
 
-            if not paragraphs:
+            if not text.strip():
                 raise ValueError("Document does not contain text")
 
-            return "\n\n".join(paragraphs)
+            return text
 
         except (ValueError, OSError, AttributeError) as e:
             raise ValueError(f"Error reading DOCX: {e!s}") from e
 
+    @classmethod
+    def _extract_from_doc(cls, path: str) -> str:
+        # Files saved as DOCX but named .doc are common, they do not need a converter.
+        if zipfile.is_zipfile(path):
+            return cls._extract_from_docx(path)
+
+        try:
+            text = convert_doc_to_text(path, timeout=settings.FILE_EXTRACTION_TIMEOUT)
+        except (subprocess.SubprocessError, OSError) as e:
+            raise ValueError(f"Error reading DOC: {e!s}") from e
+
+        if not text.strip():
+            raise ValueError("Document does not contain text")
+        return text
+
     @classmethod
     def _extract_from_text(cls, content: bytes) -> str:
         try:
@@ -0,0 +1,152 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+from app.core import Settings
+from app.utils import log
+
+
+@dataclass
+class CachedHistory:
+    summary: str | None
+    summary_message_id: int | None
+    messages_count: int
+    # Always a suffix of the conversation: either every message after the summary or the latest `maxlen` of them.
+    messages: deque[dict] = field(default_factory=deque)
+
+    @property
+    def size(self) -> int:
+        return len(self.summary or "") + sum(len(message["content"]) for message in self.messages)
+
+    def extend(self, messages: list[dict], messages_count: int) -> bool:
+        # A count that does not line up means another writer got in between, the buffer has a gap.
+        if self.messages_count + len(messages) != messages_count:
+            return False
+        self.messages.extend(messages)
+        self.messages_count = messages_count
+        return True
+
+    def advance_summary(self, summary: str, summary_message_id: int) -> None:
+        self.summary = summary
+        self.summary_message_id = summary_message_id
+        while self.messages and self.messages[0]["id"] <= summary_message_id:
+            self.messages.popleft()
+
+    def history(self, limit: int) -> list[dict[str, str]]:
+        recent = list(self.messages)[-limit:] if limit > 0 else []
+        return [{"role": message["role"], "content": message["content"]} for message in recent]
+
+
+class HistoryCacheBackend(ABC):
+    name: str = "base"
+
+    def __init__(self, max_messages: int) -> None:
+        self.max_messages = max_messages
+
+    @abstractmethod
+    async def get(self, conversation_id: int) -> CachedHistory | None: ...
+
+    @abstractmethod
+    async def set(self, conversation_id: int, history: CachedHistory) -> None: ...
+
+    @abstractmethod
+    async def append(self, conversation_id: int, messages: list[dict], messages_count: int) -> None: ...
+
+    @abstractmethod
+    async def update_summary(self, conversation_id: int, summary: str, summary_message_id: int) -> None: ...
+
+    @abstractmethod
+    async def invalidate(self, conversation_id: int) -> None: ...
+
+    async def close(self) -> None:  # noqa: PLR6301
+        return None
+
+
+class InMemoryHistoryCache(HistoryCacheBackend):
+    name = "memory"
+
+    def __init__(self, max_messages: int, max_conversations: int, max_chars: int, ttl: float) -> None:
+        super().__init__(max_messages)
+        self.max_conversations = max_conversations
+        self.max_chars = max_chars
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, CachedHistory]] = OrderedDict()
+        self._sizes: dict[int, int] = {}
+        self._total_chars = 0
+
+    async def get(self, conversation_id: int) -> CachedHistory | None:
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return None
+
+        expires_at, history = entry
+        if expires_at < time.monotonic():
+            self._remove(conversation_id)
+            return None
+
+        self._entries.move_to_end(conversation_id)
+        return history
+
+    async def set(self, conversation_id: int, history: CachedHistory) -> None:
+        history.messages = deque(history.messages, maxlen=self.max_messages)
+        self._store(conversation_id, history)
+
+    async def append(self, conversation_id: int, messages: list[dict], messages_count: int) -> None:
+        # Conversations that are not cached yet are loaded on their next read, not here.
+        history = await self.get(conversation_id)
+        if history is None:
+            return
+        if not history.extend(messages, messages_count):
+            log.debug(f"History cache for conversation {conversation_id} is out of sync, dropping it")
+            self._remove(conversation_id)
+            return
+        self._store(conversation_id, history)
+
+    async def update_summary(self, conversation_id: int, summary: str, summary_message_id: int) -> None:
+        history = await self.get(conversation_id)
+        if history is None:
+            return
+        history.advance_summary(summary, summary_message_id)
+        self._store(conversation_id, history)
+
+    async def invalidate(self, conversation_id: int) -> None:
+        self._remove(conversation_id)
+
+    def _store(self, conversation_id: int, history: CachedHistory) -> None:
+        self._remove(conversation_id)
+        size = history.size
+        if size > self.max_chars:
+            return
+
+        self._entries[conversation_id] = (time.monotonic() + self.ttl, history)
+        self._sizes[conversation_id] = size
+        self._total_chars += size
+
+        # Least recently used conversations go first, whichever of the two bounds is exceeded.
+        while len(self._entries) > self.max_conversations or self._total_chars > self.max_chars:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def _remove(self, conversation_id: int) -> None:
+        if self._entries.pop(conversation_id, None) is not None:
+            self._total_chars -= self._sizes.pop(conversation_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def create_history_cache(settings: Settings) -> HistoryCacheBackend | None:
+    if not settings.HISTORY_CACHE_ENABLED:
+        return None
+
+    log.info(
+        f"History cache initialized in memory (max conversations: {settings.HISTORY_CACHE_MAX_CONVERSATIONS}, "
+        f"max chars: {settings.HISTORY_CACHE_MAX_CHARS}, ttl: {settings.HISTORY_CACHE_TTL}s)"
+    )
+    return InMemoryHistoryCache(
+        max_messages=settings.CONTEXT_HISTORY_FETCH_LIMIT,
+        max_conversations=settings.HISTORY_CACHE_MAX_CONVERSATIONS,
+        max_chars=settings.HISTORY_CACHE_MAX_CHARS,
+        ttl=settings.HISTORY_CACHE_TTL,
+    )
@@ -0,0 +1,156 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core import LLMBackendSettings, Settings
+from app.services.rate_limiter import AdaptiveRateLimiter
+from app.services.retry_policy import LatencyTracker
+from app.utils import log, metrics
+
+
+ERROR_RATE_PENALTY = 4.0
+
+
+def same_origin(url: str, other: str) -> bool:
+    first, second = urlsplit(url), urlsplit(other)
+    return (first.scheme, first.hostname, first.port) == (second.scheme, second.hostname, second.port)
+
+
+class LLMBackend:
+    def __init__(self, config: LLMBackendSettings, settings: Settings, metrics_prefix: str) -> None:
+        self.name = config.name
+        self.model = config.model
+        self.base_url = config.base_url
+        self.domains = frozenset(domain.lower() for domain in config.domains)
+        self.max_prompt_tokens = config.max_prompt_tokens
+        self.cost_weight = config.cost_weight
+        self.metrics_prefix = metrics_prefix
+
+        self.ewma_alpha = settings.LLM_ROUTER_EWMA_ALPHA
+        self.degraded_error_rate = settings.LLM_ROUTER_DEGRADED_ERROR_RATE
+        self.cooldown = settings.LLM_ROUTER_COOLDOWN
+        self.ewma_latency: float | None = None
+        self.error_rate = 0.0
+        self.cooldown_until = 0.0
+
+        self.rate_limiter = AdaptiveRateLimiter(
+            initial_limit=settings.MISTRAL_CONCURRENCY_INITIAL,
+            min_limit=settings.MISTRAL_CONCURRENCY_MIN,
+            max_limit=settings.MISTRAL_CONCURRENCY_MAX,
+            max_queue_size=settings.MISTRAL_QUEUE_MAX_SIZE,
+            max_wait=settings.MISTRAL_QUEUE_MAX_WAIT,
+            metrics_prefix=f"{metrics_prefix}_limiter",
+        )
+        self.latency_tracker = LatencyTracker()
+
+        api_key = config.api_key
+        # The Mistral key is only sent to the Mistral endpoint; third-party and local backends need their own api_key.
+        if api_key is None and same_origin(self.base_url, settings.MISTRAL_BASE_URL):
+            api_key = settings.MISTRAL_API_KEY
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+
+        limits = httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=50,
+            keepalive_expiry=30.0,
+        )
+
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=settings.MISTRAL_TIMEOUT,
+            limits=limits,
+            headers=headers,
+        )
+
+    def accepts(self, domain: str | None, prompt_tokens: int) -> bool:
+        if self.domains and (domain or "general").lower() not in self.domains:
+            return False
+        return self.max_prompt_tokens is None or prompt_tokens <= self.max_prompt_tokens
+
+    def is_degraded(self, now: float) -> bool:
+        return now < self.cooldown_until
+
+    def score(self) -> float:
+        latency = self.ewma_latency if self.ewma_latency is not None else 1.0
+        return latency * self.cost_weight * (1.0 + ERROR_RATE_PENALTY * self.error_rate)
+
+    def record_success(self, latency: float) -> None:
+        self.latency_tracker.observe(latency)
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency += self.ewma_alpha * (latency - self.ewma_latency)
+        self.error_rate *= 1.0 - self.ewma_alpha
+        self._update_gauges()
+
+    def record_failure(self) -> None:
+        self.error_rate += self.ewma_alpha * (1.0 - self.error_rate)
+        metrics.increment(f"{self.metrics_prefix}_errors")
+
+        if self.error_rate >= self.degraded_error_rate and not self.is_degraded(time.monotonic()):
+            self.cooldown_until = time.monotonic() + self.cooldown
+            metrics.increment(f"{self.metrics_prefix}_degraded")
+            log.warning(
+                f"LLM backend {self.name} degraded (error rate {self.error_rate:.2f}), "
+                f"out of rotation for {self.cooldown:.0f}s"
+            )
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        metrics.set_gauge(f"{self.metrics_prefix}_latency_ewma", self.ewma_latency or 0.0)
+        metrics.set_gauge(f"{self.metrics_prefix}_error_rate", self.error_rate)
+
+    async def close(self, timeout: float = 10.0) -> None:
+        try:
+            await asyncio.wait_for(self.client.aclose(), timeout=timeout)
+        except TimeoutError:
+            log.warning(f"LLM backend {self.name} client close timeout")
+
+
+class LLMRouter:
+    def __init__(self, backends: list[LLMBackend]) -> None:
+        if not backends:
+            raise ValueError("At least one LLM backend must be configured")
+        self.backends = backends
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "LLMRouter":
+        configs = settings.LLM_BACKENDS or [
+            LLMBackendSettings(name="mistral", model=settings.MISTRAL_MODEL, base_url=settings.MISTRAL_BASE_URL)
+        ]
+
+        names = [config.name for config in configs]
+        if len(set(names)) != len(names):
+            raise ValueError(f"LLM backend names must be unique: {names}")
+
+        # A single backend keeps the plain metric names so existing dashboards stay valid.
+        single = len(configs) == 1
+        backends = [
+            LLMBackend(config, settings, metrics_prefix="llm" if single else f"llm_{config.name}") for config in configs
+        ]
+        log.info(f"LLM router backends: {', '.join(f'{b.name} ({b.model})' for b in backends)}")
+        return cls(backends)
+
+    def route(self, domain: str | None, prompt_tokens: int) -> list[LLMBackend]:
+        candidates = [backend for backend in self.backends if backend.accepts(domain, prompt_tokens)]
+        if not candidates:
+            log.warning(f"No LLM backend accepts domain {domain} with ~{prompt_tokens} tokens, using all backends")
+            candidates = list(self.backends)
+
+        now = time.monotonic()
+        return sorted(candidates, key=lambda backend: (backend.is_degraded(now), backend.score()))
+
+    @staticmethod
+    def failover(candidates: list[LLMBackend], failed: LLMBackend) -> LLMBackend:
+        now = time.monotonic()
+        for backend in candidates:
+            if backend is not failed and not backend.is_degraded(now):
+                return backend
+        return failed
+
+    async def close(self, timeout: float = 10.0) -> None:
+        await asyncio.gather(*(backend.close(timeout) for backend in self.backends))
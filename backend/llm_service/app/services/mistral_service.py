@@ -1,48 +1,47 @@
 import asyncio
+import json
 import os
+import time
+from collections.abc import AsyncIterator
 from typing import Any
 
 import httpx
 from fastapi import HTTPException, status
 
 from app.core import get_settings
-from app.utils import log
+from app.services.context_builder import MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+from app.services.llm_router import LLMBackend, LLMRouter
+from app.services.response_cache import build_response_cache_key, create_response_cache
+from app.services.retry_policy import RETRYABLE_STATUS_CODES, RetryPolicy
+from app.utils import log, metrics
 
 
 DEFAULT_ERROR_RESPONSE = "Sorry, unable to generate response."
+SSE_DATA_PREFIX = "data:"
+SSE_DONE_MARKER = "[DONE]"
 
 
 class MistralService:
     def __init__(self) -> None:
         self.settings = get_settings()
         self.api_key = self.settings.MISTRAL_API_KEY
-        self.model = self.settings.MISTRAL_MODEL
-        self.base_url = self.settings.MISTRAL_BASE_URL
-        self.timeout = self.settings.MISTRAL_TIMEOUT
         self.mock_mode = os.getenv("MOCK_MISTRAL", "false").lower() == "true"
+        self.response_cache = create_response_cache(self.settings)
+        self.retry_policy = RetryPolicy(
+            max_attempts=self.settings.MISTRAL_RETRY_MAX_ATTEMPTS,
+            base_delay=self.settings.MISTRAL_RETRY_BASE_DELAY,
+            max_delay=self.settings.MISTRAL_RETRY_MAX_DELAY,
+            deadline=self.settings.MISTRAL_REQUEST_DEADLINE,
+        )
 
         if self.mock_mode:
             log.info("MistralService running in MOCK mode - LLM API calls will be simulated")
         else:
-            if not self.api_key:
+            if not self.api_key and not self.settings.LLM_BACKENDS:
                 log.error("MISTRAL_API_KEY not configured. Please set it in .env file.")
                 raise ValueError("MISTRAL_API_KEY not configured. Service cannot start without it.")
 
-            limits = httpx.Limits(
-                max_keepalive_connections=20,
-                max_connections=50,
-                keepalive_expiry=30.0,
-            )
-
-            self.client = httpx.AsyncClient(
-                base_url=self.base_url,
-                timeout=self.timeout,
-                limits=limits,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-            )
+            self.router = LLMRouter.from_settings(self.settings)
 
     async def generate(
         self,
@@ -51,42 +50,31 @@ class MistralService:
         history_messages: list[dict[str, str]] | None = None,
         temperature: float = 0.5,
         max_tokens: int = 5000,
+        domain: str | None = None,
         **kwargs: Any,
     ) -> str:
         if self.mock_mode:
-            mock_response = (
-                f"Это мок-ответ для нагрузочного тестирования. "
-                f"Получен промпт длиной {len(prompt)} символов. "
-                f"История содержит {len(history_messages) if history_messages else 0} сообщений. "
-                f"Системный промпт: {system_prompt[:50]}..."
-            )
+            mock_response = self._mock_response(prompt, system_prompt, history_messages)
             log.debug(f"Mock response generated: {len(mock_response)} chars")
             return mock_response
 
+        candidates = self.router.route(domain, self._estimate_prompt_tokens(prompt, system_prompt, history_messages))
+        cache_key = self._response_cache_key(
+            candidates, prompt, system_prompt, history_messages, temperature, max_tokens, kwargs
+        )
+        cached_response = await self._get_cached_response(cache_key)
+        if cached_response is not None:
+            return cached_response
+
         try:
             log.debug(
-                f"Generating with model: {self.model}, "
+                f"Generating with backend: {candidates[0].name} ({candidates[0].model}), "
                 f"prompt: {len(prompt)} chars, history: {len(history_messages) if history_messages else 0}"
             )
 
-            messages = [{"role": "system", "content": system_prompt}]
-
-            if history_messages:
-                messages.extend(history_messages)
-
-            current_question = f"[ТЕКУЩИЙ ВОПРОС - ОТВЕТЬ ТОЛЬКО НА НЕГО]\n{prompt}"
-            messages.append({"role": "user", "content": current_question})
+            payload = self._build_payload(prompt, system_prompt, history_messages, temperature, max_tokens, **kwargs)
 
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-                **kwargs,
-            }
-
-            response = await self.client.post("/chat/completions", json=payload)
-            response.raise_for_status()
+            _, response = await self._send_with_retries(candidates, payload, stream=False)
 
             try:
                 data = response.json()
@@ -107,35 +95,381 @@ class MistralService:
 
             log.debug(f"Generated: {len(generated_text)} chars")
 
-            return generated_text.strip()
+            generated_text = generated_text.strip()
+            await self._store_cached_response(cache_key, generated_text)
+
+            return generated_text
 
-        except httpx.TimeoutException as e:
+        except (httpx.TimeoutException, TimeoutError) as e:
             log.error(f"Mistral API timeout: {e}")
             raise ValueError("Timeout waiting for response from Mistral AI") from e
         except httpx.HTTPStatusError as e:
-            error_text = e.response.text
-            status_code = e.response.status_code
-            log.error(f"Mistral API error: {status_code} - {error_text}")
-
-            if status_code == status.HTTP_401_UNAUTHORIZED:
-                raise ValueError("Invalid API key Mistral AI") from e
-            if status_code == status.HTTP_429_TOO_MANY_REQUESTS:
-                raise HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail="Request limit exceeded for the configured Mistral model. Please retry later.",
-                ) from e
-            if status_code == status.HTTP_400_BAD_REQUEST:
-                raise ValueError(f"Error in request to Mistral AI: {error_text}") from e
-
-            raise ValueError(f"Error when contacting Mistral AI: {status_code}") from e
+            raise self._map_status_error(e) from e
+        except httpx.TransportError as e:
+            log.error(f"Mistral API transport error: {e}")
+            raise ValueError("Failed to connect to Mistral AI") from e
         except (RuntimeError, ConnectionError, OSError) as e:
             log.error(f"Unexpected error in Mistral service: {e}")
             raise ValueError(f"Unexpected error in Mistral service: {e!s}") from e
 
-    async def close(self, timeout: float = 10.0) -> None:
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: str,
+        history_messages: list[dict[str, str]] | None = None,
+        temperature: float = 0.5,
+        max_tokens: int = 5000,
+        domain: str | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[str]:
         if self.mock_mode:
+            mock_response = self._mock_response(prompt, system_prompt, history_messages)
+            for word in mock_response.split(" "):
+                yield f"{word} "
             return
+
+        candidates = self.router.route(domain, self._estimate_prompt_tokens(prompt, system_prompt, history_messages))
+        cache_key = self._response_cache_key(
+            candidates, prompt, system_prompt, history_messages, temperature, max_tokens, kwargs
+        )
+        cached_response = await self._get_cached_response(cache_key)
+        if cached_response is not None:
+            yield cached_response
+            return
+
         try:
-            await asyncio.wait_for(self.client.aclose(), timeout=timeout)
-        except TimeoutError:
-            log.warning("Mistral HTTP client close timeout, connections will be closed on object destruction")
+            log.debug(
+                f"Streaming with backend: {candidates[0].name} ({candidates[0].model}), "
+                f"prompt: {len(prompt)} chars, history: {len(history_messages) if history_messages else 0}"
+            )
+
+            payload = self._build_payload(
+                prompt, system_prompt, history_messages, temperature, max_tokens, stream=True, **kwargs
+            )
+
+            backend, response = await self._send_with_retries(candidates, payload, stream=True)
+            try:
+                streamed_parts: list[str] = []
+                async for delta in self._iter_stream_deltas(response):
+                    streamed_parts.append(delta)
+                    yield delta
+
+                streamed_text = "".join(streamed_parts).strip()
+                log.debug(f"Streamed: {len(streamed_text)} chars")
+
+                if streamed_text:
+                    await self._store_cached_response(cache_key, streamed_text)
+            finally:
+                await response.aclose()
+                await backend.rate_limiter.release()
+
+        except (httpx.TimeoutException, TimeoutError) as e:
+            log.error(f"Mistral API timeout: {e}")
+            raise ValueError("Timeout waiting for response from Mistral AI") from e
+        except httpx.HTTPStatusError as e:
+            raise self._map_status_error(e) from e
+        except httpx.TransportError as e:
+            log.error(f"Mistral API transport error: {e}")
+            raise ValueError("Failed to connect to Mistral AI") from e
+        except (RuntimeError, ConnectionError, OSError) as e:
+            log.error(f"Unexpected error in Mistral service: {e}")
+            raise ValueError(f"Unexpected error in Mistral service: {e!s}") from e
+
+    @staticmethod
+    async def _iter_stream_deltas(response: httpx.Response) -> AsyncIterator[str]:
+        async for line in response.aiter_lines():
+            if not line.startswith(SSE_DATA_PREFIX):
+                continue
+
+            data = line.removeprefix(SSE_DATA_PREFIX).strip()
+            if data == SSE_DONE_MARKER:
+                break
+
+            try:
+                chunk = json.loads(data)
+            except ValueError as e:
+                log.error(f"Failed to parse Mistral stream chunk as JSON: {e}; chunk={data}")
+                raise ValueError("Invalid JSON in stream from Mistral AI") from e
+
+            choices = chunk.get("choices") or []
+            if not choices:
+                continue
+
+            delta = choices[0].get("delta", {}).get("content")
+            if isinstance(delta, str) and delta:
+                yield delta
+
+    async def _send_with_retries(
+        self,
+        candidates: list[LLMBackend],
+        payload: dict[str, Any],
+        stream: bool,
+    ) -> tuple[LLMBackend, httpx.Response]:
+        deadline = time.monotonic() + self.retry_policy.deadline
+        backend = candidates[0]
+        attempt = 0
+
+        while True:
+            try:
+                async with asyncio.timeout(deadline - time.monotonic()):
+                    if stream:
+                        backend, response = await self._send_attempt(backend, payload)
+                    else:
+                        backend, response = await self._send_hedged(candidates, backend, payload)
+                        if not response.is_error:
+                            await self._read_response(backend, response)
+                response.raise_for_status()
+                return backend, response
+            except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                delay = self.retry_policy.retry_delay(e, attempt)
+                if delay is None or time.monotonic() + delay >= deadline:
+                    raise
+
+                attempt += 1
+                metrics.increment("llm_retries")
+
+                fallback = LLMRouter.failover(candidates, backend)
+                if fallback is not backend:
+                    # Backoff and Retry-After describe the failed backend, another one can be tried right away.
+                    metrics.increment("llm_failovers")
+                    log.warning(
+                        f"LLM backend {backend.name} failed ({e.__class__.__name__}), "
+                        f"failing over to {fallback.name}, attempt {attempt}/{self.retry_policy.max_attempts - 1}"
+                    )
+                    backend = fallback
+                    continue
+
+                log.warning(
+                    f"LLM backend {backend.name} failed ({e.__class__.__name__}), "
+                    f"retry {attempt}/{self.retry_policy.max_attempts - 1} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+
+    async def _send_hedged(
+        self,
+        candidates: list[LLMBackend],
+        backend: LLMBackend,
+        payload: dict[str, Any],
+    ) -> tuple[LLMBackend, httpx.Response]:
+        # Attempts resolve on response headers, so the hedge deadline does not count the time spent reading the body.
+        hedge_delay = self._hedge_delay(backend)
+        primary = asyncio.create_task(self._send_attempt(backend, payload))
+        attempts = [primary]
+        pending: set[asyncio.Task[tuple[LLMBackend, httpx.Response]]] = {primary}
+        winner: asyncio.Task[tuple[LLMBackend, httpx.Response]] | None = None
+
+        try:
+            if hedge_delay is not None:
+                done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+                if done:
+                    winner = primary
+                    return primary.result()
+
+                hedge_backend = LLMRouter.failover(candidates, backend)
+                metrics.increment("llm_hedged_requests")
+                log.debug(f"No response from {backend.name} after {hedge_delay:.2f}s, hedging to {hedge_backend.name}")
+                attempts.append(asyncio.create_task(self._send_attempt(hedge_backend, payload)))
+                pending.add(attempts[-1])
+
+            last_error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        winner = task
+                        return task.result()
+                    last_error = error
+
+            raise last_error or RuntimeError("LLM request finished without a response")
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            await self._discard_attempts(attempts, winner)
+
+    @staticmethod
+    async def _send_attempt(backend: LLMBackend, payload: dict[str, Any]) -> tuple[LLMBackend, httpx.Response]:
+        started_at = time.monotonic()
+        await backend.rate_limiter.acquire()
+
+        try:
+            request = backend.client.build_request(
+                "POST", "/chat/completions", json={**payload, "model": backend.model}
+            )
+            response = await backend.client.send(request, stream=True)
+        except httpx.TransportError:
+            backend.record_failure()
+            await backend.rate_limiter.release()
+            raise
+        except BaseException:
+            await backend.rate_limiter.release()
+            raise
+
+        try:
+            await backend.rate_limiter.on_response(response.status_code, response.headers)
+        except BaseException:
+            # A losing hedge can be cancelled while waiting for the limiter lock and still owns the connection and slot.
+            await response.aclose()
+            await backend.rate_limiter.release()
+            raise
+
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            backend.record_failure()
+
+        if not response.is_error:
+            # Latency is time to headers, the body length depends on the answer rather than on the backend.
+            backend.record_success(time.monotonic() - started_at)
+            return backend, response
+
+        await MistralService._read_response(backend, response)
+        return backend, response
+
+    @staticmethod
+    async def _read_response(backend: LLMBackend, response: httpx.Response) -> None:
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+            await backend.rate_limiter.release()
+
+    @staticmethod
+    async def _discard_attempts(
+        attempts: list[asyncio.Task[tuple[LLMBackend, httpx.Response]]],
+        winner: asyncio.Task[tuple[LLMBackend, httpx.Response]] | None,
+    ) -> None:
+        # A losing attempt that already got its headers still holds a connection and a limiter slot.
+        for task in attempts:
+            if task is winner or not task.done() or task.cancelled() or task.exception() is not None:
+                continue
+            backend, response = task.result()
+            if not response.is_error:
+                await response.aclose()
+                await backend.rate_limiter.release()
+
+    def _hedge_delay(self, backend: LLMBackend) -> float | None:
+        if not self.settings.MISTRAL_HEDGING_ENABLED:
+            return None
+
+        latency = backend.latency_tracker.percentile(self.settings.MISTRAL_HEDGE_PERCENTILE)
+        if latency is None:
+            return None
+
+        return max(latency, self.settings.MISTRAL_HEDGE_MIN_DELAY)
+
+    @staticmethod
+    def _estimate_prompt_tokens(
+        prompt: str,
+        system_prompt: str,
+        history_messages: list[dict[str, str]] | None,
+    ) -> int:
+        history_tokens = sum(
+            estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in history_messages or []
+        )
+        return estimate_tokens(system_prompt) + estimate_tokens(prompt) + history_tokens
+
+    @staticmethod
+    def _build_payload(
+        prompt: str,
+        system_prompt: str,
+        history_messages: list[dict[str, str]] | None,
+        temperature: float,
+        max_tokens: int,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        messages = [{"role": "system", "content": system_prompt}]
+
+        if history_messages:
+            messages.extend(history_messages)
+
+        current_question = f"[ТЕКУЩИЙ ВОПРОС - ОТВЕТЬ ТОЛЬКО НА НЕГО]\n{prompt}"
+        messages.append({"role": "user", "content": current_question})
+
+        return {
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            **kwargs,
+        }
+
+    def _response_cache_key(
+        self,
+        candidates: list[LLMBackend],
+        prompt: str,
+        system_prompt: str,
+        history_messages: list[dict[str, str]] | None,
+        temperature: float,
+        max_tokens: int,
+        extra: dict[str, Any],
+    ) -> str | None:
+        if self.response_cache is None or temperature > self.settings.RESPONSE_CACHE_MAX_TEMPERATURE:
+            return None
+
+        return build_response_cache_key(
+            model=",".join(sorted({backend.model for backend in candidates})),
+            system_prompt=system_prompt,
+            history_messages=history_messages,
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            extra=extra,
+        )
+
+    async def _get_cached_response(self, cache_key: str | None) -> str | None:
+        if cache_key is None or self.response_cache is None:
+            return None
+
+        cached_response = await self.response_cache.get(cache_key)
+        if cached_response is None:
+            metrics.increment("llm_response_cache_misses")
+            return None
+
+        metrics.increment("llm_response_cache_hits")
+        log.debug(f"Response cache hit ({self.response_cache.name}): {len(cached_response)} chars")
+        return cached_response
+
+    async def _store_cached_response(self, cache_key: str | None, response_text: str) -> None:
+        if cache_key is None or self.response_cache is None or response_text == DEFAULT_ERROR_RESPONSE:
+            return
+
+        await self.response_cache.set(cache_key, response_text)
+
+    @staticmethod
+    def _mock_response(
+        prompt: str,
+        system_prompt: str,
+        history_messages: list[dict[str, str]] | None,
+    ) -> str:
+        return (
+            f"Это мок-ответ для нагрузочного тестирования. "
+            f"Получен промпт длиной {len(prompt)} символов. "
+            f"История содержит {len(history_messages) if history_messages else 0} сообщений. "
+            f"Системный промпт: {system_prompt[:50]}..."
+        )
+
+    @staticmethod
+    def _map_status_error(error: httpx.HTTPStatusError) -> Exception:
+        error_text = error.response.text
+        status_code = error.response.status_code
+        log.error(f"Mistral API error: {status_code} - {error_text}")
+
+        if status_code == status.HTTP_401_UNAUTHORIZED:
+            return ValueError("Invalid API key Mistral AI")
+        if status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            return HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Request limit exceeded for the configured Mistral model. Please retry later.",
+            )
+        if status_code == status.HTTP_400_BAD_REQUEST:
+            return ValueError(f"Error in request to Mistral AI: {error_text}")
+
+        return ValueError(f"Error when contacting Mistral AI: {status_code}")
+
+    async def close(self, timeout: float = 10.0) -> None:
+        if self.response_cache is not None:
+            await self.response_cache.close()
+
+        if self.mock_mode:
+            return
+        await self.router.close(timeout=timeout)
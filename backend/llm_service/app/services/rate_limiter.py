@@ -0,0 +1,151 @@
+import asyncio
+import time
+from collections.abc import Mapping
+from contextlib import suppress
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+from fastapi import HTTPException, status
+
+from app.utils import log, metrics
+
+
+RATE_LIMIT_REMAINING_HEADERS = ("x-ratelimit-remaining-requests", "ratelimit-remaining", "x-ratelimit-remaining")
+RATE_LIMIT_RESET_HEADERS = ("x-ratelimit-reset-requests", "ratelimit-reset", "x-ratelimit-reset")
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> float | None:
+    value = headers.get("retry-after")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
+
+
+def _first_float_header(headers: Mapping[str, str], names: tuple[str, ...]) -> float | None:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except ValueError:
+            continue
+    return None
+
+
+class AdaptiveRateLimiter:
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        max_queue_size: int,
+        max_wait: float,
+        decrease_factor: float = 0.5,
+        default_backoff: float = 1.0,
+        metrics_prefix: str = "llm_limiter",
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue_size = max_queue_size
+        self.max_wait = max_wait
+        self.decrease_factor = decrease_factor
+        self.default_backoff = default_backoff
+        self.metrics_prefix = metrics_prefix
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiting = 0
+        self._blocked_until = 0.0
+        self._condition = asyncio.Condition()
+        self._update_gauges()
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    async def acquire(self) -> None:
+        if self._waiting >= self.max_queue_size:
+            metrics.increment(f"{self.metrics_prefix}_rejected")
+            log.warning(f"LLM request queue is full ({self._waiting} waiting), rejecting request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending requests to the language model. Please retry later.",
+            )
+
+        started_at = time.monotonic()
+        self._waiting += 1
+        self._update_gauges()
+
+        try:
+            async with asyncio.timeout(self.max_wait), self._condition:
+                while True:
+                    delay = self._blocked_until - time.monotonic()
+                    if delay > 0:
+                        with suppress(TimeoutError):
+                            await asyncio.wait_for(self._condition.wait(), timeout=delay)
+                        continue
+
+                    if self._in_flight < self.limit:
+                        break
+
+                    await self._condition.wait()
+
+                self._in_flight += 1
+        except TimeoutError as e:
+            metrics.increment(f"{self.metrics_prefix}_timeouts")
+            log.warning(f"Gave up waiting for an LLM slot after {self.max_wait}s")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Language model is overloaded. Please retry later.",
+            ) from e
+        finally:
+            self._waiting -= 1
+            metrics.observe(f"{self.metrics_prefix}_wait_seconds", time.monotonic() - started_at)
+            self._update_gauges()
+
+    async def release(self) -> None:
+        self._in_flight -= 1
+        self._update_gauges()
+
+        async with self._condition:
+            self._condition.notify()
+
+    async def on_response(self, status_code: int, headers: Mapping[str, str]) -> None:
+        now = time.monotonic()
+
+        async with self._condition:
+            if status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+                self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                retry_after = parse_retry_after(headers)
+                pause = retry_after if retry_after is not None else self.default_backoff
+                self._blocked_until = max(self._blocked_until, now + pause)
+                metrics.increment(f"{self.metrics_prefix}_throttled")
+                log.warning(f"Upstream rate limit hit, concurrency limit lowered to {self.limit}, pausing {pause:.1f}s")
+            elif status_code < status.HTTP_500_INTERNAL_SERVER_ERROR:
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+                remaining = _first_float_header(headers, RATE_LIMIT_REMAINING_HEADERS)
+                reset = _first_float_header(headers, RATE_LIMIT_RESET_HEADERS)
+                if remaining is not None and remaining <= 0 and reset is not None:
+                    self._blocked_until = max(self._blocked_until, now + reset)
+                    log.info(f"Upstream rate limit window exhausted, pausing new requests for {reset:.1f}s")
+
+            self._update_gauges()
+            self._condition.notify_all()
+
+    def _update_gauges(self) -> None:
+        metrics.set_gauge(f"{self.metrics_prefix}_queue_depth", self._waiting)
+        metrics.set_gauge(f"{self.metrics_prefix}_in_flight", self._in_flight)
+        metrics.set_gauge(f"{self.metrics_prefix}_concurrency_limit", self.limit)
@@ -0,0 +1,111 @@
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from typing import Any
+
+from app.core import Settings
+from app.utils import TTLCache, log
+
+
+RESPONSE_CACHE_KEY_PREFIX = "llm:response:"
+
+
+class ResponseCacheBackend(ABC):
+    name: str = "base"
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str) -> None: ...
+
+    async def close(self) -> None:  # noqa: PLR6301
+        return None
+
+
+class InMemoryResponseCache(ResponseCacheBackend):
+    name = "memory"
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    async def get(self, key: str) -> str | None:
+        value = self._cache.get(key)
+        return str(value) if value is not None else None
+
+    async def set(self, key: str, value: str) -> None:
+        self._cache.set(key, value)
+
+
+class RedisResponseCache(ResponseCacheBackend):
+    name = "redis"
+
+    def __init__(self, url: str, ttl: float) -> None:
+        from redis import asyncio as redis_asyncio  # noqa: PLC0415
+        from redis.exceptions import RedisError  # noqa: PLC0415
+
+        self._client = redis_asyncio.from_url(url, decode_responses=True)
+        self._errors: tuple[type[Exception], ...] = (RedisError, OSError)
+        self.ttl = int(ttl)
+
+    async def get(self, key: str) -> str | None:
+        try:
+            value = await self._client.get(key)
+        except self._errors as e:
+            log.warning(f"Response cache read failed, treating as miss: {e}")
+            return None
+        return str(value) if value is not None else None
+
+    async def set(self, key: str, value: str) -> None:
+        try:
+            await self._client.set(key, value, ex=self.ttl)
+        except self._errors as e:
+            log.warning(f"Response cache write failed: {e}")
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def build_response_cache_key(
+    model: str,
+    system_prompt: str,
+    history_messages: list[dict[str, str]] | None,
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    extra: dict[str, Any] | None = None,
+) -> str:
+    material = json.dumps(
+        [model, system_prompt, history_messages or [], prompt, temperature, max_tokens, extra or {}],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return RESPONSE_CACHE_KEY_PREFIX + hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def create_response_cache(settings: Settings) -> ResponseCacheBackend | None:
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+
+    if settings.RESPONSE_CACHE_REDIS_URL:
+        try:
+            cache: ResponseCacheBackend = RedisResponseCache(
+                url=settings.RESPONSE_CACHE_REDIS_URL,
+                ttl=settings.RESPONSE_CACHE_TTL,
+            )
+        except ImportError:
+            log.warning(
+                "RESPONSE_CACHE_REDIS_URL is set but the 'redis' package is not installed, using in-memory cache"
+            )
+        else:
+            log.info("Response cache initialized with Redis backend")
+            return cache
+
+    log.info(
+        f"Response cache initialized in memory (max entries: {settings.RESPONSE_CACHE_MAX_ENTRIES}, "
+        f"ttl: {settings.RESPONSE_CACHE_TTL}s)"
+    )
+    return InMemoryResponseCache(
+        max_size=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl=settings.RESPONSE_CACHE_TTL,
+    )
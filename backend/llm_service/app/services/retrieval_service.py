@@ -0,0 +1,181 @@
+import hashlib
+import heapq
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+
+from app.core import get_settings
+from app.services.file_processing_service import ProcessedFile
+from app.utils import TTLCache, log, metrics
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STEM_LENGTH = 6
+CHUNK_SEPARATOR = "\n[...]\n"
+
+
+def tokenize(text: str) -> list[str]:
+    # Cutting words to a fixed prefix is a crude stemmer, but it folds most Russian inflections together.
+    return [token[:STEM_LENGTH] for token in TOKEN_PATTERN.findall(text.lower())]
+
+
+def chunk_text(text: str, chunk_chars: int, overlap: int) -> list[str]:
+    chunks: list[str] = []
+    current = ""
+
+    for raw_paragraph in text.split("\n\n"):
+        paragraph = raw_paragraph.strip()
+        if not paragraph:
+            continue
+
+        while len(paragraph) > chunk_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:chunk_chars])
+            paragraph = paragraph[max(1, chunk_chars - overlap) :]
+
+        if current and len(current) + len(paragraph) + 2 > chunk_chars:
+            chunks.append(current)
+            current = current[-overlap:] if overlap else ""
+
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+@dataclass
+class DocumentChunk:
+    filename: str
+    position: int
+    text: str
+
+
+class BM25Index:
+    def __init__(self, chunks: list[DocumentChunk], k1: float = 1.5, b: float = 0.75) -> None:
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self._term_freqs = [Counter(tokenize(chunk.text)) for chunk in chunks]
+        self._lengths = [sum(term_freq.values()) for term_freq in self._term_freqs]
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 1.0
+
+        doc_freqs: Counter[str] = Counter()
+        for term_freq in self._term_freqs:
+            doc_freqs.update(term_freq.keys())
+        total = len(chunks)
+        self._idf = {term: math.log(1 + (total - freq + 0.5) / (freq + 0.5)) for term, freq in doc_freqs.items()}
+
+    def search(self, query: str, top_k: int) -> list[tuple[float, DocumentChunk]]:
+        terms = {term for term in tokenize(query) if term in self._idf}
+        if not terms:
+            return []
+
+        scored: list[tuple[float, int]] = []
+        for index, (term_freq, length) in enumerate(zip(self._term_freqs, self._lengths, strict=True)):
+            norm = self.k1 * (1 - self.b + self.b * length / self._avg_length)
+            score = sum(
+                self._idf[term] * term_freq[term] * (self.k1 + 1) / (term_freq[term] + norm)
+                for term in terms
+                if term in term_freq
+            )
+            if score > 0:
+                scored.append((score, index))
+
+        return [(score, self.chunks[index]) for score, index in heapq.nlargest(top_k, scored)]
+
+
+@dataclass
+class ConversationDocuments:
+    files: list[ProcessedFile] = field(default_factory=list)
+    digests: set[str] = field(default_factory=set)
+    index: BM25Index | None = None
+
+
+class RetrievalService:
+    def __init__(self) -> None:
+        self.settings = get_settings()
+        self._documents = TTLCache(max_size=self.settings.RAG_MAX_CONVERSATIONS, ttl=self.settings.RAG_INDEX_TTL)
+
+    def needs_restore(self, conversation_id: int) -> bool:
+        return self.settings.RAG_ENABLED and self._documents.get(conversation_id) is None
+
+    def select_files(
+        self,
+        conversation_id: int,
+        message: str,
+        processed_files: list[ProcessedFile],
+    ) -> list[ProcessedFile]:
+        if not self.settings.RAG_ENABLED:
+            return processed_files
+
+        documents = self._add_files(conversation_id, processed_files)
+        if not documents.files:
+            return processed_files
+
+        total_chars = sum(len(pf.extracted_text) for pf in documents.files)
+        if total_chars <= self.settings.RAG_MIN_DOCUMENT_CHARS:
+            return list(documents.files)
+
+        if documents.index is None:
+            documents.index = self._build_index(documents.files)
+
+        selected = [chunk for _, chunk in documents.index.search(message, self.settings.RAG_TOP_K)]
+        if not selected:
+            # Nothing matched (e.g. "summarize the document"), fall back to the beginning of every document:
+            # the stable sort by position takes the chunks round-robin across files.
+            selected = sorted(documents.index.chunks, key=lambda chunk: chunk.position)[: self.settings.RAG_TOP_K]
+
+        metrics.increment("rag_chunks_selected", len(selected))
+        log.info(
+            f"RAG for conversation {conversation_id}: {len(selected)}/{len(documents.index.chunks)} chunks "
+            f"from {len(documents.files)} files, {total_chars} chars indexed"
+        )
+        return self._group_chunks(selected, documents.index.chunks)
+
+    def _add_files(self, conversation_id: int, processed_files: list[ProcessedFile]) -> ConversationDocuments:
+        # Conversations without files are kept too, so later turns know there is nothing to restore from the DB.
+        documents: ConversationDocuments = self._documents.get(conversation_id) or ConversationDocuments()
+
+        for pf in processed_files:
+            digest = hashlib.sha256(f"{pf.filename}\0{pf.extracted_text}".encode()).hexdigest()
+            if digest in documents.digests:
+                continue
+            documents.digests.add(digest)
+            documents.files.append(pf)
+            documents.index = None
+
+        self._documents.set(conversation_id, documents)
+        return documents
+
+    def _build_index(self, files: list[ProcessedFile]) -> BM25Index:
+        chunks = [
+            DocumentChunk(filename=pf.filename, position=position, text=text)
+            for pf in files
+            for position, text in enumerate(
+                chunk_text(pf.extracted_text, self.settings.RAG_CHUNK_CHARS, self.settings.RAG_CHUNK_OVERLAP)
+            )
+        ]
+        metrics.increment("rag_index_builds")
+        return BM25Index(chunks)
+
+    @staticmethod
+    def _group_chunks(chunks: list[DocumentChunk], all_chunks: list[DocumentChunk]) -> list[ProcessedFile]:
+        total_chunks = Counter(chunk.filename for chunk in all_chunks)
+        by_file: dict[str, list[DocumentChunk]] = {}
+        for chunk in chunks:
+            by_file.setdefault(chunk.filename, []).append(chunk)
+
+        return [
+            ProcessedFile(
+                filename=filename,
+                extracted_text=(
+                    f"[Релевантные фрагменты: {len(file_chunks)} из {total_chunks[filename]}]\n"
+                    + CHUNK_SEPARATOR.join(chunk.text for chunk in sorted(file_chunks, key=lambda c: c.position))
+                ),
+            )
+            for filename, file_chunks in by_file.items()
+        ]
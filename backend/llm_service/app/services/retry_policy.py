@@ -0,0 +1,67 @@
+import math
+import random
+from collections import deque
+from dataclasses import dataclass
+
+import httpx
+from fastapi import status
+
+from app.services.rate_limiter import parse_retry_after
+
+
+RETRYABLE_STATUS_CODES = frozenset(
+    {
+        status.HTTP_429_TOO_MANY_REQUESTS,
+        status.HTTP_500_INTERNAL_SERVER_ERROR,
+        status.HTTP_502_BAD_GATEWAY,
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        status.HTTP_504_GATEWAY_TIMEOUT,
+    }
+)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    deadline: float = 180.0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0.0, min(self.max_delay, self.base_delay * 2**attempt))  # noqa: S311
+
+    def retry_delay(self, error: Exception, attempt: int) -> float | None:
+        if attempt + 1 >= self.max_attempts:
+            return None
+
+        if isinstance(error, httpx.HTTPStatusError):
+            status_code = error.response.status_code
+            if status_code not in RETRYABLE_STATUS_CODES:
+                return None
+            if status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+                retry_after = parse_retry_after(error.response.headers)
+                if retry_after is not None:
+                    return min(retry_after, self.deadline)
+            return self.backoff(attempt)
+
+        if isinstance(error, httpx.TransportError):
+            return self.backoff(attempt)
+
+        return None
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, quantile: float) -> float | None:
+        if len(self._samples) < self.min_samples:
+            return None
+
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(quantile * len(ordered)) - 1))
+        return ordered[index]
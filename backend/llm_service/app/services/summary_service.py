@@ -0,0 +1,98 @@
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core import get_settings
+from app.core.database import AsyncSessionLocal
+from app.prompts import SUMMARY_SYSTEM_PROMPT, build_summary_request
+from app.repositories import ConversationRepository, MessageRepository
+from app.services.context_builder import truncate_to_tokens
+from app.services.history_cache import HistoryCacheBackend
+from app.services.mistral_service import DEFAULT_ERROR_RESPONSE, MistralService
+from app.utils import log, metrics
+
+
+class SummaryService:
+    def __init__(self, mistral_service: MistralService, history_cache: HistoryCacheBackend | None = None) -> None:
+        self.settings = get_settings()
+        self.mistral_service = mistral_service
+        self.history_cache = history_cache
+        self._tasks: dict[int, asyncio.Task[None]] = {}
+
+    def should_refresh(self, unsummarized_messages: int) -> bool:
+        if not self.settings.SUMMARY_ENABLED:
+            return False
+        threshold = self.settings.SUMMARY_KEEP_RECENT + self.settings.SUMMARY_REFRESH_EVERY
+        return unsummarized_messages >= min(threshold, self.settings.CONTEXT_HISTORY_FETCH_LIMIT)
+
+    def schedule_refresh(self, conversation_id: int) -> None:
+        if conversation_id in self._tasks:
+            return
+
+        task = asyncio.create_task(self._refresh(conversation_id))
+        self._tasks[conversation_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(conversation_id, None))
+
+    async def _refresh(self, conversation_id: int) -> None:
+        keep_recent = self.settings.SUMMARY_KEEP_RECENT
+
+        try:
+            async with AsyncSessionLocal() as session:
+                conversation_repo = ConversationRepository(session)
+                message_repo = MessageRepository(session)
+
+                summary, summary_message_id = await conversation_repo.get_summary(conversation_id)
+                messages = await message_repo.get_messages_after(
+                    conversation_id,
+                    after_message_id=summary_message_id,
+                    limit=self.settings.SUMMARY_BATCH_SIZE + keep_recent,
+                )
+                await session.close()
+
+                to_summarize = messages[: max(0, len(messages) - keep_recent)]
+                if len(to_summarize) < self.settings.SUMMARY_REFRESH_EVERY:
+                    return
+
+                log.info(f"Refreshing summary for conversation {conversation_id}: {len(to_summarize)} new messages")
+
+                transcript = [
+                    {
+                        "role": m["role"],
+                        "content": truncate_to_tokens(m["content"], self.settings.CONTEXT_HISTORY_MESSAGE_MAX_TOKENS),
+                    }
+                    for m in to_summarize
+                ]
+                new_summary = await self.mistral_service.generate(
+                    prompt=build_summary_request(summary, transcript),
+                    system_prompt=SUMMARY_SYSTEM_PROMPT,
+                    temperature=0.2,
+                    max_tokens=self.settings.SUMMARY_MAX_TOKENS,
+                )
+                if not new_summary.strip() or new_summary == DEFAULT_ERROR_RESPONSE:
+                    # Keeping the old summary and cursor leaves the messages in the backlog for a later turn to retry.
+                    metrics.increment("conversation_summaries_failed")
+                    log.warning(f"Empty summary generated for conversation {conversation_id}, keeping the previous one")
+                    return
+
+                await conversation_repo.update_summary(conversation_id, new_summary, to_summarize[-1]["id"])
+                await session.commit()
+                if self.history_cache is not None:
+                    await self.history_cache.update_summary(conversation_id, new_summary, to_summarize[-1]["id"])
+
+                metrics.increment("conversation_summaries_refreshed")
+                log.info(f"Summary for conversation {conversation_id} updated: {len(new_summary)} chars")
+
+        except (HTTPException, ValueError, SQLAlchemyError, RuntimeError, OSError) as e:
+            metrics.increment("conversation_summaries_failed")
+            log.warning(f"Failed to refresh summary for conversation {conversation_id}: {e}")
+
+    async def close(self, timeout: float = 10.0) -> None:
+        tasks = list(self._tasks.values())
+        if not tasks:
+            return
+
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,374 @@
+import codecs
+import csv
+import math
+import re
+import zipfile
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import PurePosixPath
+from xml.etree.ElementTree import Element, iterparse  # noqa: S405
+
+import chardet
+
+
+HEAD_ROWS = 10
+TAIL_ROWS = 5
+MAX_COLUMNS = 50
+MAX_TRACKED_VALUES = 1000
+TOP_VALUES = 3
+MAX_CELL_CHARS = 60
+CSV_SAMPLE_BYTES = 64 * 1024
+MAX_SHEETS = 10
+
+CELL_REF_PATTERN = re.compile(r"[A-Z]+")
+THOUSANDS_PATTERN = re.compile(r"[-+]?\d{1,3}(?P<sep>[,.])\d{3}(?:(?P=sep)\d{3})*")
+BUILTIN_DATE_FORMAT_IDS = range(14, 23)
+FORMAT_LITERAL_PATTERN = re.compile(r'"[^"]*"|\\.|\[[^\]]*\]')
+EXCEL_EPOCH = datetime(1899, 12, 30)
+SECONDS_PER_DAY = 86400
+MAX_DATE_CHARS = 19
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%d.%m.%Y %H:%M")
+
+
+@dataclass
+class ColumnStats:
+    name: str
+    filled: int = 0
+    numbers: int = 0
+    dates: int = 0
+    minimum: float | None = None
+    maximum: float | None = None
+    total: float = 0.0
+    first_date: datetime | None = None
+    last_date: datetime | None = None
+    date_format: str | None = None
+    values: Counter[str] = field(default_factory=Counter)
+    values_overflow: bool = False
+
+    def add(self, value: str) -> None:
+        if not value:
+            return
+        self.filled += 1
+
+        number = parse_number(value)
+        if number is not None:
+            self.numbers += 1
+            self.total += number
+            self.minimum = number if self.minimum is None else min(self.minimum, number)
+            self.maximum = number if self.maximum is None else max(self.maximum, number)
+            return
+
+        date = self._parse_date(value)
+        if date is not None:
+            self.dates += 1
+            self.first_date = date if self.first_date is None else min(self.first_date, date)
+            self.last_date = date if self.last_date is None else max(self.last_date, date)
+            return
+
+        # Distinct values are tracked up to a cap so a free-text column cannot grow memory with the row count.
+        if value in self.values or len(self.values) < MAX_TRACKED_VALUES:
+            self.values[value] += 1
+        else:
+            self.values_overflow = True
+
+    def _parse_date(self, value: str) -> datetime | None:
+        if not value[:1].isdigit() or len(value) > MAX_DATE_CHARS:
+            return None
+
+        # Columns use one date format throughout, so the last match is tried first.
+        formats = DATE_FORMATS if self.date_format is None else (self.date_format, *DATE_FORMATS)
+        for date_format in formats:
+            try:
+                date = datetime.strptime(value, date_format)
+            except ValueError:
+                continue
+            self.date_format = date_format
+            return date
+        return None
+
+    def describe(self, rows: int) -> str:
+        parts = [f"заполнено {self.filled}/{rows}"]
+        text_values = self.filled - self.numbers - self.dates
+
+        if self.numbers and self.numbers >= text_values + self.dates and self.minimum is not None:
+            column_type = "число"
+            parts.append(
+                f"мин {format_number(self.minimum)}, макс {format_number(self.maximum or 0.0)}, "
+                f"среднее {format_number(self.total / self.numbers)}"
+            )
+        elif self.dates and self.dates >= text_values and self.first_date and self.last_date:
+            column_type = "дата"
+            parts.append(f"{self.first_date:%Y-%m-%d} - {self.last_date:%Y-%m-%d}")
+        elif self.filled:
+            column_type = "текст"
+            distinct = f"{len(self.values)}+" if self.values_overflow else str(len(self.values))
+            top = ", ".join(f"{truncate(value)} ({count})" for value, count in self.values.most_common(TOP_VALUES))
+            parts.append(f"уникальных {distinct}, частые: {top}")
+        else:
+            column_type = "пусто"
+
+        return f"- {self.name} ({column_type}): {', '.join(parts)}"
+
+
+def parse_number(value: str) -> float | None:
+    candidate = value.replace(" ", "").replace(" ", "")
+    integer, point, fraction = candidate, "", ""
+    last = max(candidate.rfind(","), candidate.rfind("."))
+    # A separator that occurs once is the decimal one ("1,5", "1,234.56"), repeated ones group thousands ("1.234.567").
+    if last >= 0 and candidate.count(candidate[last]) == 1:
+        integer, point, fraction = candidate[:last], ".", candidate[last + 1 :]
+    if "," in integer or "." in integer:
+        grouped = THOUSANDS_PATTERN.fullmatch(integer)
+        if grouped is None:
+            return None
+        integer = integer.replace(grouped["sep"], "")
+    try:
+        number = float(integer + point + fraction)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def format_number(value: float) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def truncate(value: str) -> str:
+    value = value.replace("\n", " ").replace("|", "/")
+    return value if len(value) <= MAX_CELL_CHARS else value[: MAX_CELL_CHARS - 1] + "…"
+
+
+def summarize_rows(rows: Iterable[list[str]], title: str = "Таблица") -> str:
+    iterator = iter(rows)
+    header = next((row for row in iterator if any(cell.strip() for cell in row)), None)
+    if header is None:
+        return f"[{title}: нет данных]"
+
+    width = min(len(header), MAX_COLUMNS)
+    names = [cell.strip() or f"Столбец {index + 1}" for index, cell in enumerate(header[:width])]
+    columns = [ColumnStats(name) for name in names]
+    head: list[list[str]] = []
+    tail: deque[list[str]] = deque(maxlen=TAIL_ROWS)
+    row_count = 0
+
+    for raw_row in iterator:
+        row = [cell.strip() for cell in raw_row[:width]]
+        if not any(row):
+            continue
+        row.extend([""] * (width - len(row)))
+
+        row_count += 1
+        for column, value in zip(columns, row, strict=True):
+            column.add(value)
+        if len(head) < HEAD_ROWS:
+            head.append(row)
+        else:
+            tail.append(row)
+
+    dropped = f", показаны первые {width} из {len(header)} столбцов" if len(header) > width else ""
+    lines = [f"[{title}: {row_count} строк, {width} столбцов{dropped}]", "Столбцы:"]
+    lines.extend(column.describe(row_count) for column in columns)
+
+    if head:
+        lines.append(f"Первые {len(head)} строк:" if tail else "Строки:")
+        lines.append(format_row(names))
+        lines.extend(format_row(row) for row in head)
+    if tail:
+        lines.append(f"Последние {len(tail)} строк:")
+        lines.extend(format_row(row) for row in tail)
+
+    return "\n".join(lines)
+
+
+def format_row(row: list[str]) -> str:
+    return "| " + " | ".join(truncate(cell) for cell in row) + " |"
+
+
+def summarize_csv(path: str) -> str:
+    with open(path, "rb") as raw_file:
+        sample = raw_file.read(CSV_SAMPLE_BYTES)
+
+    encoding = detect_encoding(sample)
+    sample_text = sample.decode(encoding, errors="ignore")
+    try:
+        dialect: type[csv.Dialect] | csv.Dialect = csv.Sniffer().sniff(sample_text, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+
+    with open(path, encoding=encoding, errors="replace", newline="") as text_file:
+        return summarize_rows(csv.reader(text_file, dialect))
+
+
+def detect_encoding(sample: bytes) -> str:
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multibyte character cut at the sample boundary is not a reason to doubt UTF-8.
+        if e.start < len(sample) - 3:
+            return chardet.detect(sample).get("encoding") or "utf-8"
+    return "utf-8"
+
+
+def summarize_xlsx(path: str) -> str:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            shared_strings = read_shared_strings(archive)
+            date_styles = read_date_styles(archive)
+            sheets = list_sheets(archive)
+            if not sheets:
+                raise ValueError("Workbook does not contain sheets")
+
+            summaries = [
+                summarize_rows(
+                    iter_sheet_rows(archive, sheet_path, shared_strings, date_styles), title=f"Лист «{name}»"
+                )
+                for name, sheet_path in sheets[:MAX_SHEETS]
+            ]
+            if len(sheets) > MAX_SHEETS:
+                summaries.append(f"[Показаны первые {MAX_SHEETS} из {len(sheets)} листов]")
+            return "\n\n".join(summaries)
+
+    except (zipfile.BadZipFile, KeyError, SyntaxError) as e:
+        raise ValueError(f"Error reading XLSX: {e!s}") from e
+
+
+def read_shared_strings(archive: zipfile.ZipFile) -> list[str]:
+    # Stdlib expat does not resolve external entities, so workbook XML is parsed without defusedxml.
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+
+    strings: list[str] = []
+    with archive.open("xl/sharedStrings.xml") as xml_file:
+        for _, element in iterparse(xml_file):  # noqa: S314
+            if local_name(element.tag) == "si":
+                strings.append("".join(text.text or "" for text in iter_local(element, "t")))
+                element.clear()
+    return strings
+
+
+def read_date_styles(archive: zipfile.ZipFile) -> set[int]:
+    if "xl/styles.xml" not in archive.namelist():
+        return set()
+
+    custom_formats: dict[str, str] = {}
+    style_formats: list[str] = []
+    in_cell_formats = False
+    with archive.open("xl/styles.xml") as xml_file:
+        for event, element in iterparse(xml_file, events=("start", "end")):  # noqa: S314
+            name = local_name(element.tag)
+            if name == "cellXfs":
+                # cellStyleXfs holds xf elements too, but the s attribute of a cell indexes cellXfs only.
+                in_cell_formats = event == "start"
+            elif event == "end" and name == "numFmt":
+                custom_formats[element.get("numFmtId", "")] = element.get("formatCode", "")
+            elif event == "end" and name == "xf" and in_cell_formats:
+                style_formats.append(element.get("numFmtId", "0"))
+
+    return {
+        index
+        for index, format_id in enumerate(style_formats)
+        if is_date_format(format_id, custom_formats.get(format_id))
+    }
+
+
+def is_date_format(format_id: str, format_code: str | None) -> bool:
+    if format_code is None:
+        return format_id.isdigit() and int(format_id) in BUILTIN_DATE_FORMAT_IDS
+
+    code = FORMAT_LITERAL_PATTERN.sub("", format_code).lower()
+    # "m" alone is ambiguous: next to hours or seconds it means minutes.
+    return bool(re.search(r"[dy]", code)) or ("m" in code and not re.search(r"[hs]", code))
+
+
+def list_sheets(archive: zipfile.ZipFile) -> list[tuple[str, str]]:
+    with archive.open("xl/_rels/workbook.xml.rels") as xml_file:
+        targets = {
+            element.get("Id"): element.get("Target", "")
+            for _, element in iterparse(xml_file)  # noqa: S314
+            if local_name(element.tag) == "Relationship"
+        }
+
+    sheets: list[tuple[str, str]] = []
+    with archive.open("xl/workbook.xml") as xml_file:
+        for _, element in iterparse(xml_file):  # noqa: S314
+            if local_name(element.tag) != "sheet":
+                continue
+            relationship_id = next((value for key, value in element.attrib.items() if local_name(key) == "id"), None)
+            target = targets.get(relationship_id)
+            if target:
+                sheet_path = target.lstrip("/") if target.startswith("/") else str(PurePosixPath("xl") / target)
+                sheets.append((element.get("name", sheet_path), sheet_path))
+    return sheets
+
+
+def iter_sheet_rows(
+    archive: zipfile.ZipFile, sheet_path: str, shared_strings: list[str], date_styles: set[int]
+) -> Iterator[list[str]]:
+    with archive.open(sheet_path) as xml_file:
+        for _, element in iterparse(xml_file):  # noqa: S314
+            if local_name(element.tag) != "row":
+                continue
+
+            row: list[str] = []
+            for cell in iter_local(element, "c"):
+                reference = CELL_REF_PATTERN.match(cell.get("r", ""))
+                if reference:
+                    index = column_index(reference.group())
+                    if index >= MAX_COLUMNS * 2:
+                        continue
+                    row.extend([""] * (index - len(row)))
+                row.append(cell_value(cell, shared_strings, date_styles))
+
+            # Parsed rows are dropped right away, so memory stays flat regardless of the sheet size.
+            element.clear()
+            yield row
+
+
+def column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def local_name(tag: str) -> str:
+    # Transitional and Strict OOXML put the same elements in different namespaces.
+    return tag.rpartition("}")[2]
+
+
+def iter_local(element: Element, name: str) -> Iterator[Element]:
+    return (child for child in element.iter() if local_name(child.tag) == name)
+
+
+def cell_value(cell: Element, shared_strings: list[str], date_styles: set[int]) -> str:
+    cell_type = cell.get("t")
+    if cell_type == "inlineStr":
+        return "".join(text.text or "" for text in iter_local(cell, "t"))
+
+    value_element = next(iter_local(cell, "v"), None)
+    value = (value_element.text if value_element is not None else None) or ""
+    if cell_type == "s" and value.isdigit():
+        index = int(value)
+        return shared_strings[index] if index < len(shared_strings) else ""
+    if cell_type == "b":
+        return "TRUE" if value == "1" else "FALSE"
+    style = cell.get("s", "")
+    if cell_type in {None, "n"} and value and style.isdigit() and int(style) in date_styles:
+        return format_serial_date(value)
+    return value
+
+
+def format_serial_date(value: str) -> str:
+    try:
+        seconds = round(float(value) * SECONDS_PER_DAY)
+        date = EXCEL_EPOCH + timedelta(seconds=seconds)
+    except (ValueError, OverflowError):
+        return value
+
+    if seconds < SECONDS_PER_DAY:
+        return f"{date:%H:%M:%S}"
+    return f"{date:%Y-%m-%d}" if seconds % SECONDS_PER_DAY == 0 else f"{date:%Y-%m-%d %H:%M:%S}"
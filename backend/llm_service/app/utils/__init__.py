@@ -1,9 +1,19 @@
+from .cursor import decode_cursor, encode_cursor
 from .error_handlers import handle_api_error
 from .logger import Logger, log
+from .metrics import Metrics, metrics
+from .single_flight import SingleFlight
+from .ttl_cache import TTLCache
 
 
 __all__ = [
     "Logger",
+    "Metrics",
+    "SingleFlight",
+    "TTLCache",
+    "decode_cursor",
+    "encode_cursor",
     "handle_api_error",
     "log",
+    "metrics",
 ]
@@ -290,9 +290,7 @@ class LoadTester:
         self.metrics.add_result(result)
 
     async def get_conversations(self):
-        result = await self._make_request(
-            "GET", f"{self.base_url}/conversations?limit=50&offset=0", endpoint="/conversations"
-        )
+        result = await self._make_request("GET", f"{self.base_url}/conversations?limit=50", endpoint="/conversations")
         self.metrics.add_result(result)
 
     async def get_messages(self, conversation_id: int):
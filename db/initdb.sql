@@ -9,10 +9,14 @@ CREATE TABLE conversations (
     title VARCHAR(100) DEFAULT 'Новый диалог',
     business_context TEXT,
     created_at TIMESTAMPTZ DEFAULT NOW(),
-    user_id BIGINT NOT NULL REFERENCES users(user_id)
+    user_id BIGINT NOT NULL REFERENCES users(user_id),
+    summary TEXT,
+    summary_message_id BIGINT,
+    messages_count INTEGER NOT NULL DEFAULT 0,
+    last_message_at TIMESTAMPTZ
 );
 CREATE INDEX ix_conversations_user_id ON conversations(user_id);
-CREATE INDEX ix_conversations_user_created ON conversations(user_id, created_at);
+CREATE INDEX ix_conversations_user_created_id ON conversations(user_id, created_at, conversation_id);
 CREATE TABLE messages (
     message_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
     role VARCHAR(50) NOT NULL CHECK (role IN ('user', 'assistant')),
@@ -24,4 +28,21 @@ CREATE TABLE messages (
     conversation_id BIGINT NOT NULL REFERENCES conversations(conversation_id) ON DELETE CASCADE
 );
 CREATE INDEX ix_messages_conversation_id ON messages(conversation_id);
-CREATE INDEX ix_messages_conversation_created ON messages(conversation_id, created_at);
+CREATE INDEX ix_messages_conversation_created_id ON messages(conversation_id, created_at, message_id);
+CREATE TABLE attachments (
+    attachment_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    conversation_id BIGINT NOT NULL REFERENCES conversations(conversation_id) ON DELETE CASCADE,
+    file_name TEXT NOT NULL,
+    content_type TEXT,
+    content_hash TEXT NOT NULL,
+    extracted_text TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT uq_attachments_conversation_hash UNIQUE (conversation_id, content_hash)
+);
+CREATE INDEX ix_attachments_conversation_id ON attachments(conversation_id);
+CREATE TABLE message_attachments (
+    message_id BIGINT NOT NULL REFERENCES messages(message_id) ON DELETE CASCADE,
+    attachment_id BIGINT NOT NULL REFERENCES attachments(attachment_id) ON DELETE CASCADE,
+    PRIMARY KEY (message_id, attachment_id)
+);
+CREATE INDEX ix_message_attachments_attachment_id ON message_attachments(attachment_id);
@@ -0,0 +1,17 @@
+CREATE TABLE IF NOT EXISTS attachments (
+    attachment_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    conversation_id BIGINT NOT NULL REFERENCES conversations(conversation_id) ON DELETE CASCADE,
+    file_name TEXT NOT NULL,
+    content_type TEXT,
+    content_hash TEXT NOT NULL,
+    extracted_text TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT uq_attachments_conversation_hash UNIQUE (conversation_id, content_hash)
+);
+CREATE INDEX IF NOT EXISTS ix_attachments_conversation_id ON attachments(conversation_id);
+CREATE TABLE IF NOT EXISTS message_attachments (
+    message_id BIGINT NOT NULL REFERENCES messages(message_id) ON DELETE CASCADE,
+    attachment_id BIGINT NOT NULL REFERENCES attachments(attachment_id) ON DELETE CASCADE,
+    PRIMARY KEY (message_id, attachment_id)
+);
+CREATE INDEX IF NOT EXISTS ix_message_attachments_attachment_id ON message_attachments(attachment_id);
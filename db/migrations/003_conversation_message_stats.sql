@@ -0,0 +1,13 @@
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS messages_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS last_message_at TIMESTAMPTZ;
+
+-- Recomputes the counters from scratch, so it is safe to run again after the new code is deployed.
+UPDATE conversations AS c
+SET messages_count = stats.messages_count,
+    last_message_at = stats.last_message_at
+FROM (
+    SELECT conversation_id, COUNT(*) AS messages_count, MAX(created_at) AS last_message_at
+    FROM messages
+    GROUP BY conversation_id
+) AS stats
+WHERE c.conversation_id = stats.conversation_id;
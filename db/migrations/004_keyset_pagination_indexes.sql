@@ -0,0 +1,8 @@
+-- CONCURRENTLY cannot run inside a transaction block: apply this file with plain psql, without --single-transaction.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_conversations_user_created_id
+    ON conversations(user_id, created_at, conversation_id);
+DROP INDEX CONCURRENTLY IF EXISTS ix_conversations_user_created;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_conversation_created_id
+    ON messages(conversation_id, created_at, message_id);
+DROP INDEX CONCURRENTLY IF EXISTS ix_messages_conversation_created;
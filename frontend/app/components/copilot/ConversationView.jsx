@@ -1,6 +1,7 @@
 'use client';
 
 import { useEffect, useRef, useState } from 'react';
+import { Button } from '../ui/button';
 import { Card } from '../ui/card';
 import { Copy, Check, Paperclip } from './icons';
 import { cn } from '../ui/utils';
@@ -10,7 +11,15 @@ import { useToast } from '../ui/toast';
 import { Markdown } from '../ui/markdown';
 import styles from './ConversationView.module.css';
 
-export function ConversationView({ messages, typingState, onTypingComplete, isLoadingAnswer }) {
+export function ConversationView({
+  messages,
+  typingState,
+  onTypingComplete,
+  isLoadingAnswer,
+  hasOlderMessages = false,
+  isLoadingOlderMessages = false,
+  onLoadOlderMessages,
+}) {
   const bottomRef = useRef(null);
   const [animatedText, setAnimatedText] = useState('');
   const [copiedMessageId, setCopiedMessageId] = useState(null);
@@ -20,6 +29,9 @@ export function ConversationView({ messages, typingState, onTypingComplete, isLo
   const currentIndexRef = useRef(0);
   const toast = useToast();
 
+  const lastMessageId = messages[messages.length - 1]?.id;
+
+  // Keyed on the last message, so prepending an older page keeps the reader where they are.
   useEffect(() => {
     if (bottomRef.current) {
       const timeoutId = setTimeout(() => {
@@ -27,7 +39,7 @@ export function ConversationView({ messages, typingState, onTypingComplete, isLo
       }, 100);
       return () => clearTimeout(timeoutId);
     }
-  }, [messages.length, animatedText, typingState.messageId]);
+  }, [lastMessageId, animatedText, typingState.messageId]);
 
   useEffect(() => {
     if (!typingState.messageId || !typingState.fullText) {
@@ -140,6 +152,18 @@ export function ConversationView({ messages, typingState, onTypingComplete, isLo
 
   return (
     <div className={styles.conversationList} aria-live="polite" aria-atomic="false">
+      {hasOlderMessages && (
+        <Button
+          type="button"
+          variant="ghost"
+          size="sm"
+          className={styles.loadOlderButton}
+          onClick={onLoadOlderMessages}
+          disabled={isLoadingOlderMessages}
+        >
+          {isLoadingOlderMessages ? 'Загрузка...' : 'Показать предыдущие сообщения'}
+        </Button>
+      )}
       {messages.map(message => {
         const content = getMessageContent(message);
         const isAssistant = message.role === 'assistant';
@@ -121,6 +121,8 @@ export function QuestionPanel({ onSubmit, isLoading }) {
         return File;
       case 'txt':
       case 'md':
+      case 'csv':
+      case 'xlsx':
         return FileText;
       default:
         return File;
@@ -139,6 +141,9 @@ export function QuestionPanel({ onSubmit, isLoading }) {
         return '#6b7280';
       case 'md':
         return '#9933ff';
+      case 'csv':
+      case 'xlsx':
+        return '#217346';
       default:
         return '#9ca3af';
     }
@@ -38,6 +38,7 @@ export default function Home() {
   const [sessions, setSessions] = useState([initialSession]);
   const [activeSessionId, setActiveSessionId] = useState(initialSession.id);
   const [isLoadingAnswer, setIsLoadingAnswer] = useState(false);
+  const [isLoadingOlderMessages, setIsLoadingOlderMessages] = useState(false);
   const [typingState, setTypingState] = useState({
     messageId: null,
     fullText: '',
@@ -86,12 +87,9 @@ export default function Home() {
     if (!isAuthenticated || !userId) return;
 
     try {
-      const response = await fetch(
-        `${API_URL}/conversations?limit=50&offset=0`,
-        {
-          headers: getAuthHeaders(),
-        },
-      );
+      const response = await fetch(`${API_URL}/conversations?limit=50`, {
+        headers: getAuthHeaders(),
+      });
 
       if (!response.ok) {
         const errorMessage = await handleApiError(
@@ -124,7 +122,7 @@ export default function Home() {
         const firstConversation = loadedSessions[0];
         if (firstConversation.conversationId) {
           try {
-            const messages = await loadMessagesForConversation(
+            const { messages, nextCursor } = await loadMessagesForConversation(
               firstConversation.conversationId,
             );
             setSessions((prevSessions) => {
@@ -133,6 +131,7 @@ export default function Home() {
                 updated[0] = {
                   ...updated[0],
                   messages,
+                  olderMessagesCursor: nextCursor,
                 };
               }
               return updated;
@@ -364,12 +363,13 @@ export default function Home() {
 
     if (session && session.conversationId && session.messages.length === 0) {
       try {
-        const messages = await loadMessagesForConversation(
+        const { messages, nextCursor } = await loadMessagesForConversation(
           session.conversationId,
         );
         updateSession(sessionId, (s) => ({
           ...s,
           messages,
+          olderMessagesCursor: nextCursor,
         }));
       } catch (error) {
         console.error('[Messages] Error loading messages:', error);
@@ -378,6 +378,31 @@ export default function Home() {
     }
   };
 
+  const handleLoadOlderMessages = useCallback(async () => {
+    const session = sessions.find((s) => s.id === activeSessionId);
+    if (!session?.olderMessagesCursor || isLoadingOlderMessages) {
+      return;
+    }
+
+    setIsLoadingOlderMessages(true);
+    try {
+      const { messages, nextCursor } = await loadMessagesForConversation(
+        session.conversationId,
+        session.olderMessagesCursor,
+      );
+      updateSession(session.id, (s) => ({
+        ...s,
+        messages: [...messages, ...s.messages],
+        olderMessagesCursor: nextCursor,
+      }));
+    } catch (error) {
+      console.error('[Messages] Error loading older messages:', error);
+      toast.error(error.message || 'Ошибка при загрузке сообщений');
+    } finally {
+      setIsLoadingOlderMessages(false);
+    }
+  }, [sessions, activeSessionId, isLoadingOlderMessages, updateSession, toast]);
+
   const handleDeleteSession = useCallback(
     async (sessionId) => {
       const session = sessions.find((s) => s.id === sessionId);
@@ -645,6 +670,9 @@ export default function Home() {
                     typingState={typingState}
                     onTypingComplete={handleTypingComplete}
                     isLoadingAnswer={isLoadingAnswer}
+                    hasOlderMessages={Boolean(activeSession.olderMessagesCursor)}
+                    isLoadingOlderMessages={isLoadingOlderMessages}
+                    onLoadOlderMessages={handleLoadOlderMessages}
                   />
                 ) : (
                   <div className={styles.emptyState}>
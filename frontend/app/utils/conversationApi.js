@@ -1,8 +1,16 @@
 import { API_URL, getAuthHeaders, handleApiError } from './apiHelpers';
 
-export async function loadMessagesForConversation(conversationId) {
+const MESSAGES_PAGE_SIZE = 50;
+
+export async function loadMessagesForConversation(conversationId, cursor = null) {
+  // Pages go from the newest messages backwards; nextCursor points at the page before this one.
+  const params = new URLSearchParams({ limit: String(MESSAGES_PAGE_SIZE) });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+
   const response = await fetch(
-    `${API_URL}/conversations/${conversationId}/messages`,
+    `${API_URL}/conversations/${conversationId}/messages?${params}`,
     {
       headers: getAuthHeaders(),
     },
@@ -17,5 +25,8 @@ export async function loadMessagesForConversation(conversationId) {
   }
 
   const data = await response.json();
-  return data.messages || [];
+  return {
+    messages: data.messages || [],
+    nextCursor: data.has_more ? data.next_cursor : null,
+  };
 }
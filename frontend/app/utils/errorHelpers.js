@@ -46,6 +46,7 @@ const translateErrorMessage = (message) => {
     'unexpected error in mistral service':
       'Неожиданная ошибка в сервисе Mistral',
     'invalid pagination parameters': 'Некорректные параметры пагинации',
+    'invalid pagination cursor': 'Некорректный курсор пагинации',
     'file name is not specified': 'Имя файла не указано',
     'invalid file format': 'Некорректный формат файла',
     'file is too large': 'Файл слишком большой',
@@ -57,7 +58,11 @@ const translateErrorMessage = (message) => {
     'error reading pdf': 'Ошибка чтения PDF',
     'document does not contain text': 'Документ не содержит текста',
     'error reading docx': 'Ошибка чтения DOCX',
+    'legacy doc files cannot be converted':
+      'Файлы DOC не поддерживаются сервером, сохраните файл в формате DOCX',
     'error reading text file': 'Ошибка чтения текстового файла',
+    'workbook does not contain sheets': 'Книга не содержит листов',
+    'error reading xlsx': 'Ошибка чтения XLSX',
   };
 
   const lowerMessage = message.toLowerCase();
@@ -1,4 +1,4 @@
-export const ALLOWED_FILE_TYPES = ['.pdf', '.txt', '.md', '.docx', '.doc'];
+export const ALLOWED_FILE_TYPES = ['.pdf', '.txt', '.md', '.docx', '.doc', '.csv', '.xlsx'];
 export const MAX_FILE_SIZE = 10 * 1024 * 1024;
 export const MAX_FILES = 5;
 export const MAX_TOTAL_SIZE = 15 * 1024 * 1024;